@@ -1,56 +1,111 @@
+import json
+import logging
+import os
 import string
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
 
 class Rotor:
-    def __init__(self, wiring, position=0):
-        self.wiring = wiring  # Wiring is a list of tuples (e.g., [[23, 13], ...])
+    def __init__(self, wiring, position=0, trace=None):
+        self.wiring_base = wiring  # Wiring is a list of tuples (e.g., [[23, 13], ...])
         self.position = position
-        self.wiring_letters = ""
+        self.offset = 0  # Number of steps taken since creation (mod 26)
+        self.steps = 0  # Total steps taken, kept whether or not tracing is on
+        self.trace = trace  # Optional callable receiving one message per event, e.g. print
         self.alphabet = string.ascii_uppercase
 
-        for index in range(len(self.wiring)):
-            letter_index = self.wiring[index][0]
-            for index2 in range(len(self.wiring)):
-                letter_index2 = self.wiring[index2][1]
-                if letter_index == letter_index2:
-                    self.wiring_letters += self.alphabet[index2]
-                    break
-        print(f"Rotor creation, letter-mapping: {self.wiring_letters}")
+        # Row of each contact on the output side, so the forward permutation is built in one pass
+        output_row = {pair[1]: row for row, pair in enumerate(self.wiring_base)}
+        forward = [output_row[pair[0]] for pair in self.wiring_base]
+
+        # Stepping the rotor r times turns f(i) into f(i - r) + r, so every letter-mapping the rotor
+        # can ever have is known up front and rotating only has to move the offset
+        self.forward_tables = [
+            [(forward[(index - shift) % 26] + shift) % 26 for index in range(26)]
+            for shift in range(26)
+        ]
+        self.letter_tables = [
+            "".join(self.alphabet[index] for index in table) for table in self.forward_tables
+        ]
+        self.forward_array = np.array(self.forward_tables, dtype=np.uint8)  # Row r is the mapping at offset r
+
+        # Same tables for the signal travelling backwards through the rotor
+        self.inverse_tables = []
+        for table in self.forward_tables:
+            inverse = [0] * 26
+            for index, output in enumerate(table):
+                inverse[output] = index
+            self.inverse_tables.append(inverse)
+        self.inverse_letter_tables = [
+            "".join(self.alphabet[index] for index in table) for table in self.inverse_tables
+        ]
+        self.inverse_array = np.array(self.inverse_tables, dtype=np.uint8)
+        if self.trace is not None:
+            self.trace(f"Rotor creation, letter-mapping: {self.wiring_letters}")
+
+    @property
+    def wiring(self):
+        # Wiring as it would look after moving the last pair to the front 'offset' times
+        return self.wiring_base[26 - self.offset:] + self.wiring_base[:26 - self.offset]
+
+    @property
+    def wiring_letters(self):
+        return self.letter_tables[self.offset]
 
     def encode_forward(self, letter):
         # Convert letter to its index
-        alphabet = string.ascii_uppercase
-        letter_index = alphabet.index(letter)
-        print(f"Transformation is {letter} to {self.wiring_letters[letter_index]}")
+        if not "A" <= letter <= "Z":
+            raise ValueError(f"{letter!r} is not a letter from A to Z")
+        letter_index = ord(letter) - 65
+        output = self.letter_tables[self.offset][letter_index]
+        if self.trace is not None:
+            self.trace(f"Transformation is {letter} to {output}")
+
+        return output
 
-        return self.wiring_letters[letter_index]
+    def encode_backward(self, letter):
+        # Undo encode_forward at the current offset
+        if not "A" <= letter <= "Z":
+            raise ValueError(f"{letter!r} is not a letter from A to Z")
+        return self.inverse_letter_tables[self.offset][ord(letter) - 65]
 
     def rotate(self, number=0):
         # Rotate rotor by moving the wiring by one position (move last to front)
         self.position = (self.position + 1) % 26
-        self.wiring = [self.wiring[-1]] + self.wiring[:-1]
-        self.wiring_letters = ""
-        for index in range(len(self.wiring)):
-            letter_index = self.wiring[index][0]
-            for index2 in range(len(self.wiring)):
-                letter_index2 = self.wiring[index2][1]
-                if letter_index == letter_index2:
-                    self.wiring_letters += self.alphabet[index2]
-                    break
+        self.offset = (self.offset + 1) % 26
+        self.steps += 1
+
+        if self.trace is not None:
+            self.trace(f"\nNew wiring for rotor {number+1}: {self.wiring}")
+            self.trace(f"New letters: {self.wiring_letters}")
 
-        print(f"\nNew wiring for rotor {number+1}: {self.wiring}")
-        print(f"New letters: {self.wiring_letters}")
+    def advance(self, steps):
+        # Apply 'steps' rotations at once, without reporting each one
+        self.position = (self.position + steps) % 26
+        self.offset = (self.offset + steps) % 26
+        self.steps += steps
 
 
 class RotorMachine:
-    def __init__(self, rotors, count=0):
+    def __init__(self, rotors, count=0, trace=None, sample_rate=1):
         self.rotors = rotors
         self.count = count
+        # encrypt() reports every 'sample_rate'-th letter to 'trace'; nothing is formatted when it is None
+        self.trace = trace
+        self.sample_rate = sample_rate
+        self.letters_processed = 0
+        # Rotors 2 and 3 through to the output, keyed by their offsets (filled lazily by encrypt_cached)
+        self.stack_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     def encrypt(self, plaintext):
-        ciphertext = ''
+        trace = self.trace
+        ciphertext = []
         for letter in plaintext:
             if letter not in string.ascii_uppercase:
-                ciphertext += letter  # Ignore non-alphabet characters
+                ciphertext.append(letter)  # Ignore non-alphabet characters
                 continue
 
 
@@ -60,7 +115,10 @@ class RotorMachine:
                 signal = rotor.encode_forward(signal)
 
             # Step 3: Append the result to ciphertext
-            ciphertext += signal
+            ciphertext.append(signal)
+            if trace is not None and self.letters_processed % self.sample_rate == 0:
+                trace(f"Letter {self.letters_processed}: {letter} to {signal}, count {self.count}")
+            self.letters_processed += 1
             self.rotors[0].rotate(0)
             self.count += 1
             if self.count % 26 == 0:
@@ -68,7 +126,226 @@ class RotorMachine:
             if self.count % (26*26) == 0:
                 self.rotors[2].rotate(2)
 
-        return ciphertext
+        return "".join(ciphertext)
+
+    def composed_table(self, second_offset, third_offset):
+        """
+        Return rotors 2 and 3 at the given offsets composed into a single letter-mapping.
+
+        The two slow rotors only move every 26 and 676 letters, so there are just 676 such tables.
+        They are built on first use and kept in stack_cache.
+
+        Parameters:
+        - second_offset (int): Offset of rotor 2.
+        - third_offset (int): Offset of rotor 3.
+
+        Returns:
+        - str: 26 output letters, indexed by the output index of rotor 1.
+        """
+        key = (second_offset, third_offset)
+        table = self.stack_cache.get(key)
+        if table is None:
+            self.cache_misses += 1
+            second = self.rotors[1].forward_tables[second_offset]
+            third = self.rotors[2].letter_tables[third_offset]
+            table = "".join(third[index] for index in second)
+            self.stack_cache[key] = table
+        else:
+            self.cache_hits += 1
+        return table
+
+    def encrypt_cached(self, plaintext):
+        """
+        Encrypt 'plaintext' letter by letter using the composed tables of the slow rotors.
+
+        Gives the same output and leaves the same state as encrypt(), but each letter costs one lookup
+        in rotor 1 and one in the composed table, which suits short interactive or streamed input.
+
+        Parameters:
+        - plaintext (str): Text to encrypt; non-letters are passed through.
+
+        Returns:
+        - str: The ciphertext.
+        """
+        first, second, third = self.rotors
+        table = self.composed_table(second.offset, third.offset)
+        ciphertext = []
+        for letter in plaintext:
+            if not "A" <= letter <= "Z":
+                ciphertext.append(letter)
+                continue
+
+            ciphertext.append(table[first.forward_tables[first.offset][ord(letter) - 65]])
+            first.advance(1)
+            self.count += 1
+            self.letters_processed += 1
+            if self.count % 26 == 0:
+                second.advance(1)
+                if self.count % (26*26) == 0:
+                    third.advance(1)
+                table = self.composed_table(second.offset, third.offset)
+
+        return "".join(ciphertext)
+
+    def stats(self):
+        # Per-run counters, available without enabling any tracing
+        return {"letters": self.letters_processed, "rotor_steps": [rotor.steps for rotor in self.rotors]}
+
+    def cache_stats(self):
+        # Hit/miss counts of the composed-table cache and how many of the 676 tables are built
+        return {"hits": self.cache_hits, "misses": self.cache_misses, "tables": len(self.stack_cache)}
+
+    def encrypt_array(self, data):
+        """
+        Encrypt an array of ASCII codes in one vectorized pass.
+
+        The rotor offsets used for the i-th letter only depend on count + i: rotor 1 has stepped once
+        per letter, rotor 2 once per multiple of 26 passed and rotor 3 once per multiple of 676 passed.
+        All offsets are therefore computed up front and each rotor is applied with one fancy-indexing
+        lookup into its table of 26 letter-mappings. Anything that is not 'A'-'Z' is copied unchanged
+        and does not advance the rotors, exactly as in encrypt().
+
+        Parameters:
+        - data (array-like): Character codes, converted to a uint8 array.
+
+        Returns:
+        - np.ndarray: A new uint8 array holding the ciphertext codes.
+        """
+        return self.transform_array(data, inverse=False)
+
+    def decrypt_array(self, data):
+        # Inverse of encrypt_array(): the inverse tables are applied from rotor 3 back to rotor 1
+        return self.transform_array(data, inverse=True)
+
+    def transform_array(self, data, inverse=False):
+        data = np.asarray(data, dtype=np.uint8)
+        is_letter = (data >= 65) & (data <= 90)
+        signal = data[is_letter] - 65
+        letters = signal.size
+
+        counts = self.count + np.arange(letters, dtype=np.int64)
+        signal = apply_rotors(self.rotors, signal, rotor_steps(self.count, counts), inverse)
+
+        output = data.copy()
+        output[is_letter] = signal + 65
+
+        # Leave the machine where encrypt() would have left it
+        self.skip(letters)
+        self.letters_processed += letters
+        return output
+
+    def skip(self, letters):
+        """
+        Move the machine forward as if 'letters' letters had been encrypted.
+
+        The state only depends on count, so this costs the same for any distance and lets a machine
+        start at an arbitrary letter offset of a message without replaying what comes before it.
+
+        Parameters:
+        - letters (int): Number of letters (not characters) to skip over.
+        """
+        end = self.count + letters
+        self.rotors[0].advance(letters)
+        self.rotors[1].advance(end // 26 - self.count // 26)
+        self.rotors[2].advance(end // (26*26) - self.count // (26*26))
+        self.count = end
+
+    def encrypt_bytes(self, plaintext):
+        """
+        Encrypt a bytes object with encrypt_array(), returning bytes.
+
+        Parameters:
+        - plaintext (bytes): ASCII (or UTF-8) encoded plaintext.
+
+        Returns:
+        - bytes: The ciphertext, the same length as the plaintext.
+        """
+        return self.encrypt_array(np.frombuffer(plaintext, dtype=np.uint8)).tobytes()
+
+    def decrypt_bytes(self, ciphertext):
+        # Inverse of encrypt_bytes() for a machine started in the same state
+        return self.decrypt_array(np.frombuffer(ciphertext, dtype=np.uint8)).tobytes()
+
+    def decrypt(self, ciphertext):
+        """
+        Decrypt 'ciphertext' produced by encrypt() on a machine that started in the same state.
+
+        Parameters:
+        - ciphertext (str): Text to decrypt; non-letters are passed through.
+
+        Returns:
+        - str: The plaintext.
+        """
+        return self.decrypt_bytes(ciphertext.encode("utf-8")).decode("utf-8")
+
+    def encrypt_stream(self, chunks):
+        """
+        Encrypt an iterable of chunks lazily, yielding one ciphertext chunk per input chunk.
+
+        The machine carries its state from one chunk to the next, so the concatenated output equals
+        encrypting the concatenated input in one go. Chunks may be bytes or str (str is handled as
+        UTF-8, whose multi-byte sequences never contain 'A'-'Z' and so pass through untouched).
+
+        Parameters:
+        - chunks (iterable): Plaintext pieces, e.g. a generator or a list of lines.
+
+        Yields:
+        - bytes or str: The ciphertext of each chunk, of the same type as the chunk.
+        """
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                yield self.encrypt_bytes(chunk.encode("utf-8")).decode("utf-8")
+            else:
+                yield self.encrypt_bytes(chunk)
+
+    def encrypt_file(self, source, sink, block_size=1 << 20, checkpoint=None, checkpoint_every=64):
+        """
+        Encrypt a binary file object into another one, 'block_size' bytes at a time.
+
+        Memory use is bounded by the block size. When 'checkpoint' is given it is called every
+        'checkpoint_every' blocks (and at the end), after the output has been flushed, with the
+        machine state and the number of bytes done so far, e.g. save_checkpoint bound to a path.
+        A job that dies can then be resumed by restoring the state with set_state() and seeking
+        both files to that many bytes.
+
+        Parameters:
+        - source (file): Readable binary file object.
+        - sink (file): Writable binary file object.
+        - block_size (int): Number of bytes read per block.
+        - checkpoint (callable): Optional checkpoint(state, bytes_done) callback.
+        - checkpoint_every (int): Blocks between checkpoints.
+
+        Returns:
+        - int: The number of bytes processed by this call.
+        """
+        bytes_done = 0
+        blocks = 0
+        for block in iter(lambda: source.read(block_size), b""):
+            sink.write(self.encrypt_bytes(block))
+            bytes_done += len(block)
+            blocks += 1
+            if checkpoint is not None and blocks % checkpoint_every == 0:
+                sink.flush()
+                checkpoint(self.get_state(), bytes_done)
+        if checkpoint is not None:
+            sink.flush()
+            checkpoint(self.get_state(), bytes_done)
+        return bytes_done
+
+    def get_state(self):
+        # Everything that changes while encrypting, as a JSON-serializable dict
+        return {
+            "count": self.count,
+            "offsets": [rotor.offset for rotor in self.rotors],
+            "positions": [rotor.position for rotor in self.rotors],
+        }
+
+    def set_state(self, state):
+        # Restore a state returned by get_state() on a machine built with the same wirings
+        self.count = state["count"]
+        for rotor, offset, position in zip(self.rotors, state["offsets"], state["positions"]):
+            rotor.offset = offset
+            rotor.position = position
 
 
 # Define the wiring for the three rotors
@@ -92,16 +369,206 @@ rotor_3_wiring = [
     [25, 1], [26, 14]
 ]
 
-# Create the rotors
-rotor_1 = Rotor(rotor_1_wiring)
-rotor_2 = Rotor(rotor_2_wiring)
-rotor_3 = Rotor(rotor_3_wiring)
 
-# Assemble the rotor machine
-machine = RotorMachine([rotor_1, rotor_2, rotor_3], count=673)
+def logger_trace(logger, level=logging.DEBUG):
+    """
+    Turn a logger into a trace callback, checking the level once here rather than per letter.
+
+    Parameters:
+    - logger (logging.Logger): Logger to send trace messages to.
+    - level (int): Level to log them at.
+
+    Returns:
+    - callable or None: None when the level is disabled, so tracing costs nothing.
+    """
+    if not logger.isEnabledFor(level):
+        return None
+    return lambda message: logger.log(level, message)
+
+
+def rotor_steps(start_count, counts):
+    """
+    Number of steps each rotor has taken when the machine reaches 'counts', having started at 'start_count'.
+
+    Parameters:
+    - start_count (int or np.ndarray): Count the machine started from.
+    - counts (np.ndarray): Count at each letter.
+
+    Returns:
+    - tuple: Step arrays for rotors 1, 2 and 3.
+    """
+    return (
+        counts - start_count,
+        counts // 26 - start_count // 26,
+        counts // (26*26) - start_count // (26*26),
+    )
+
+
+def apply_rotors(rotors, signal, steps, inverse=False):
+    """
+    Send an array of letter indices through the rotors, each letter at its own rotor offsets.
+
+    Parameters:
+    - rotors (list): The three rotors; their current offsets are the starting offsets.
+    - signal (np.ndarray): Letter indices 0-25.
+    - steps (tuple): Per-letter steps of each rotor, as returned by rotor_steps().
+    - inverse (bool): Go backwards (rotor 3 to rotor 1) through the inverse tables.
+
+    Returns:
+    - np.ndarray: The output letter indices.
+    """
+    if inverse:
+        for rotor, steps_taken in reversed(list(zip(rotors, steps))):
+            signal = rotor.inverse_array[(rotor.offset + steps_taken) % 26, signal]
+    else:
+        for rotor, steps_taken in zip(rotors, steps):
+            signal = rotor.forward_array[(rotor.offset + steps_taken) % 26, signal]
+    return signal
+
+
+def transform_batch(rotors, messages, counts, inverse=False):
+    """
+    Encrypt (or decrypt) many independent messages in a single vectorized call.
+
+    Every message is treated as if it were processed by its own machine built from 'rotors' in their
+    current state with the given starting count, but all letters of all messages go through
+    apply_rotors() together, so no machine or per-message Python object is created. The rotors are
+    not moved.
+
+    Parameters:
+    - rotors (list): The three rotors giving the starting offsets for every message.
+    - messages (list): Messages as bytes.
+    - counts (list): Starting count of each message.
+    - inverse (bool): Decrypt instead of encrypt.
+
+    Returns:
+    - list: The transformed messages, as bytes, in the same order.
+    """
+    lengths = np.array([len(message) for message in messages], dtype=np.int64)
+    data = np.frombuffer(b"".join(messages), dtype=np.uint8)
+    is_letter = (data >= 65) & (data <= 90)
+
+    # Message each letter belongs to, and its rank among that message's letters
+    owner = np.repeat(np.arange(len(messages)), lengths)[is_letter]
+    letters_per_message = np.bincount(owner, minlength=len(messages))
+    first_letter = np.cumsum(letters_per_message) - letters_per_message
+    rank = np.arange(owner.size, dtype=np.int64) - first_letter[owner]
+
+    start_counts = np.asarray(counts, dtype=np.int64)[owner]
+    signal = apply_rotors(rotors, data[is_letter] - 65, rotor_steps(start_counts, start_counts + rank), inverse)
+
+    output = data.copy()
+    output[is_letter] = signal + 65
+    boundaries = np.cumsum(lengths)
+    return [output[end - length:end].tobytes() for end, length in zip(boundaries, lengths)]
+
+
+def create_machine(wirings, count=0, offset=0, start_offsets=(0, 0, 0)):
+    """
+    Build a machine from fresh rotors started at 'count', then skip 'offset' letters into the message.
+
+    Parameters:
+    - wirings (list): One wiring list per rotor, fastest rotor first.
+    - count (int): The count the message was started with.
+    - offset (int): How many letters of the message come before the part to encrypt.
+    - start_offsets (tuple): Steps each rotor was turned before the message started.
+
+    Returns:
+    - RotorMachine: A machine ready to encrypt from that letter onwards.
+    """
+    rotors = [Rotor(wiring) for wiring in wirings]
+    for rotor, steps in zip(rotors, start_offsets):
+        rotor.advance(steps)
+    machine = RotorMachine(rotors, count=count)
+    machine.skip(offset)
+    return machine
+
+
+def save_checkpoint(path, state, bytes_done):
+    """
+    Write a machine state and progress marker to 'path' as JSON.
+
+    The file is written to a temporary name first and then renamed, so a crash never leaves a
+    half-written checkpoint behind.
+
+    Parameters:
+    - path (str): Checkpoint file.
+    - state (dict): State returned by RotorMachine.get_state().
+    - bytes_done (int): Input bytes already encrypted and flushed.
+    """
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as file:
+        json.dump({"state": state, "bytes_done": bytes_done}, file)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path):
+    # Inverse of save_checkpoint: returns (state, bytes_done)
+    with open(path) as file:
+        checkpoint = json.load(file)
+    return checkpoint["state"], checkpoint["bytes_done"]
+
+
+def count_letters(data):
+    # Number of bytes in 'A'-'Z', i.e. how far a chunk moves the rotors
+    return len(data) - len(data.translate(None, string.ascii_uppercase.encode()))
+
+
+def _encrypt_chunk(wirings, count, offset, chunk):
+    return create_machine(wirings, count, offset).encrypt_bytes(chunk)
+
+
+def encrypt_file_parallel(input_path, output_path, wirings, count=0, chunk_size=1 << 22, max_workers=None):
+    """
+    Encrypt a file in chunks on a process pool, writing the ciphertext in order.
+
+    Each chunk is handed to a worker with the number of letters that precede it, so the worker can
+    create its machine at that offset directly. Non-letters do not move the rotors, which is why the
+    offsets are letter counts rather than byte positions. Only a couple of chunks per worker are kept
+    in flight, so memory stays bounded for any file size.
+
+    Parameters:
+    - input_path (str): File holding the plaintext.
+    - output_path (str): File the ciphertext is written to.
+    - wirings (list): One wiring list per rotor, fastest rotor first.
+    - count (int): The starting count of the machine.
+    - chunk_size (int): Number of bytes per chunk.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    - int: The number of letters encrypted.
+
+    Raises:
+    - ValueError: If output_path is input_path, which would be truncated before it is read.
+    """
+    if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+        raise ValueError(f"{output_path} is the input file and cannot be written in place")
+    max_workers = max_workers or os.cpu_count() or 1
+    offset = 0
+    pending = deque()
+    with open(input_path, "rb") as source, open(output_path, "wb") as sink, \
+            ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunk in iter(lambda: source.read(chunk_size), b""):
+            pending.append(executor.submit(_encrypt_chunk, wirings, count, offset, chunk))
+            offset += count_letters(chunk)
+            if len(pending) >= 2 * max_workers:
+                sink.write(pending.popleft().result())
+        while pending:
+            sink.write(pending.popleft().result())
+    return offset
+
+
+if __name__ == "__main__":
+    # Create the rotors, printing every transformation and step
+    rotor_1 = Rotor(rotor_1_wiring, trace=print)
+    rotor_2 = Rotor(rotor_2_wiring, trace=print)
+    rotor_3 = Rotor(rotor_3_wiring, trace=print)
+
+    # Assemble the rotor machine
+    machine = RotorMachine([rotor_1, rotor_2, rotor_3], count=673)
 
-# Example usage
-plaintext = "PERSPICACIOUS"
-ciphertext = machine.encrypt(plaintext)
-print(f"Plaintext:  {plaintext}")
-print(f"Ciphertext: {ciphertext}")
+    # Example usage
+    plaintext = "PERSPICACIOUS"
+    ciphertext = machine.encrypt(plaintext)
+    print(f"Plaintext:  {plaintext}")
+    print(f"Ciphertext: {ciphertext}")
@@ -0,0 +1,297 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import permutations
+import numpy as np
+from question1_assignment2_8191716 import (Rotor, apply_rotors, create_machine, rotor_1_wiring, rotor_2_wiring,
+                                          rotor_3_wiring, rotor_steps)
+
+SETTINGS_PER_COUNT = 26 ** 3  # Start offsets (o1, o2, o3) tried for every count
+ENGLISH_IOC = 0.0667  # Index of coincidence of English text, uniformly random letters give ~0.0385
+ALIGNMENTS_PER_SLICE = 4096  # Crib alignments compared at once, bounds the (alignments, 26^3) match matrix
+
+
+def letter_indices(ciphertext):
+    """
+    Keep only the letters of 'ciphertext' as indices 0-25; only they move the rotors.
+
+    Parameters:
+    - ciphertext (str or bytes): Ciphertext produced by RotorMachine.
+
+    Returns:
+    - np.ndarray: uint8 array of letter indices.
+    """
+    if isinstance(ciphertext, str):
+        ciphertext = ciphertext.encode("utf-8")
+    data = np.frombuffer(ciphertext, dtype=np.uint8)
+    return data[(data >= 65) & (data <= 90)] - 65
+
+
+def inverse_stack(wirings):
+    # (3, 26, 26) array holding the inverse tables of every offset, fastest rotor first
+    return np.stack([Rotor(wiring).inverse_array for wiring in wirings])
+
+
+def forward_stack(wirings):
+    # (3, 26, 26) array holding the forward tables of every offset, fastest rotor first
+    return np.stack([Rotor(wiring).forward_array for wiring in wirings])
+
+
+def decrypt_all_offsets(signal, inverse_tables, count):
+    """
+    Decrypt 'signal' under every start offset (o1, o2, o3) of the rotors for a given count.
+
+    This is the search kernel: it works on the rotor tables directly and broadcasts one pass per rotor
+    over all offsets of that rotor, so the 26^3 trial decryptions cost three fancy-indexing operations.
+    Trial t = o1 * 676 + o2 * 26 + o3 is the setting used by create_machine(wirings, count,
+    start_offsets=(o1, o2, o3)).
+
+    Parameters:
+    - signal (np.ndarray): Ciphertext letter indices.
+    - inverse_tables (np.ndarray): Result of inverse_stack() for the rotor order being tried.
+    - count (int): Starting count of the machine; only count % 676 changes the stepping.
+
+    Returns:
+    - np.ndarray: (26^3, len(signal)) uint8 array of candidate plaintext indices.
+    """
+    letters = signal.size
+    first_steps, second_steps, third_steps = rotor_steps(count, count + np.arange(letters, dtype=np.int64))
+    offsets = np.arange(26)
+
+    # Backwards through rotor 3, then 2, then 1, adding one axis of offsets per rotor
+    signal = inverse_tables[2][(offsets[:, None] + third_steps) % 26, signal]
+    signal = inverse_tables[1][(offsets[:, None, None] + second_steps) % 26, signal[None, :, :]]
+    signal = inverse_tables[0][(offsets[:, None, None, None] + first_steps) % 26, signal[None, :, :, :]]
+    return signal.reshape(SETTINGS_PER_COUNT, letters)
+
+
+def score_ioc(candidates):
+    """
+    Index of coincidence of every row of 'candidates'.
+
+    Parameters:
+    - candidates (np.ndarray): (trials, letters) array of letter indices.
+
+    Returns:
+    - np.ndarray: One score per trial; English scores around ENGLISH_IOC.
+    """
+    trials, letters = candidates.shape
+    keys = (np.arange(trials, dtype=np.int64)[:, None] * 26 + candidates).ravel()
+    frequencies = np.bincount(keys, minlength=trials * 26).reshape(trials, 26).astype(np.int64)
+    return (frequencies * (frequencies - 1)).sum(axis=1) / max(letters * (letters - 1), 1)
+
+
+def score_ngrams(candidates, log_probabilities, n):
+    """
+    Mean n-gram log-probability of every row of 'candidates'.
+
+    Parameters:
+    - candidates (np.ndarray): (trials, letters) array of letter indices.
+    - log_probabilities (np.ndarray): Flat table of 26^n log-probabilities indexed in base 26.
+    - n (int): N-gram length of the table.
+
+    Returns:
+    - np.ndarray: One score per trial; higher is more English-like.
+    """
+    letters = candidates.shape[1]
+    index = np.zeros((candidates.shape[0], letters - n + 1), dtype=np.int64)
+    for position in range(n):
+        index = index * 26 + candidates[:, position:letters - n + 1 + position]
+    return log_probabilities[index].mean(axis=1)
+
+
+def _search_counts(signal, inverse_tables, counts, keep, log_probabilities, n):
+    # Worker: best 'keep' settings over all start offsets for each count in 'counts'
+    results = []
+    for count in counts:
+        candidates = decrypt_all_offsets(signal, inverse_tables, count)
+        if log_probabilities is None:
+            scores = score_ioc(candidates)
+        else:
+            scores = score_ngrams(candidates, log_probabilities, n)
+        for trial in np.argpartition(scores, -keep)[-keep:]:
+            offsets = (int(trial) // 676, int(trial) // 26 % 26, int(trial) % 26)
+            results.append((float(scores[trial]), count, offsets))
+    return results
+
+
+def search_settings(ciphertext, wirings, orderings=None, counts=range(26*26), max_letters=600, keep=10,
+                    threshold=None, log_probabilities=None, n=4, counts_per_task=13, max_workers=None):
+    """
+    Ciphertext-only search for the rotor order, start offsets and count of a RotorMachine message.
+
+    For every rotor order and every count, all 26^3 start offsets are decrypted at once with
+    decrypt_all_offsets() and scored, either by index of coincidence or, when 'log_probabilities'
+    is given, by n-gram fitness. Counts are spread over a process pool in groups of
+    'counts_per_task'. Once a score reaches 'threshold' the remaining work is cancelled.
+
+    A threshold trades correctness for time: the search stops at the first setting that reaches it,
+    which on short messages can be a near miss scoring below the true setting. Leave it at None to
+    search everything and get the true best scores.
+
+    Parameters:
+    - ciphertext (str or bytes): The ciphertext; non-letters are ignored.
+    - wirings (list): The three rotor wirings.
+    - orderings (iterable): Orders of the wirings to try, as index tuples; defaults to the given order.
+      Use itertools.permutations(range(3)) to try all six.
+    - counts (iterable): Starting counts to try. The stepping only depends on count % 676, so the
+      default covers every case and the count found is the true count modulo 676.
+    - max_letters (int): Only the first 'max_letters' letters are scored, to bound memory.
+    - keep (int): Number of best settings kept per count and returned overall.
+    - threshold (float): Stop early once a score reaches this value, e.g. 0.06 for IoC.
+    - log_probabilities (np.ndarray): Optional flat n-gram log-probability table.
+    - n (int): N-gram length of 'log_probabilities'.
+    - counts_per_task (int): Counts handled by one worker task.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    - list: Up to 'keep' tuples (score, ordering, count, start_offsets), best first.
+    """
+    signal = letter_indices(ciphertext)[:max_letters]
+    orderings = [tuple(range(len(wirings)))] if orderings is None else [tuple(order) for order in orderings]
+    counts = list(counts)
+    results = []
+
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        futures = {}
+        for ordering in orderings:
+            inverse_tables = inverse_stack([wirings[index] for index in ordering])
+            for start in range(0, len(counts), counts_per_task):
+                future = executor.submit(_search_counts, signal, inverse_tables,
+                                         counts[start:start + counts_per_task], keep, log_probabilities, n)
+                futures[future] = ordering
+
+        for future in as_completed(futures):
+            ordering = futures[future]
+            results.extend((score, ordering, count, offsets) for score, count, offsets in future.result())
+            if threshold is not None and max(score for score, _, _, _ in results) >= threshold:
+                for pending in futures:
+                    pending.cancel()
+                break
+
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results[:keep]
+
+
+def encrypt_all_offsets(crib, forward_tables, count):
+    """
+    Encrypt 'crib' under every start offset (o1, o2, o3) of the rotors for a given count.
+
+    These are the per-position tables of the crib attack: they do not depend on where the crib sits
+    in the ciphertext, only on the machine state where it starts.
+
+    Parameters:
+    - crib (np.ndarray): Crib letter indices.
+    - forward_tables (np.ndarray): Result of forward_stack() for the rotor order being tried.
+    - count (int): Count of the machine at the first crib letter.
+
+    Returns:
+    - np.ndarray: (26^3, len(crib)) uint8 array, trial t = o1 * 676 + o2 * 26 + o3.
+    """
+    first_steps, second_steps, third_steps = rotor_steps(count, count + np.arange(crib.size, dtype=np.int64))
+    offsets = np.arange(26)
+
+    signal = forward_tables[0][(offsets[:, None] + first_steps) % 26, crib]
+    signal = forward_tables[1][(offsets[:, None, None] + second_steps) % 26, signal[None, :, :]]
+    signal = forward_tables[2][(offsets[:, None, None, None] + third_steps) % 26, signal[None, :, :, :]]
+    # Axes are (o3, o2, o1, letter); put them in the same order as decrypt_all_offsets()
+    return np.ascontiguousarray(signal.transpose(2, 1, 0, 3)).reshape(SETTINGS_PER_COUNT, crib.size)
+
+
+def _crib_counts(signal, crib, forward_tables, counts):
+    # Worker: every (alignment, setting) consistent with the crib, for crib-start counts in 'counts'
+    alignments = signal.size - crib.size + 1
+    matches = []
+    for crib_count in counts:
+        encrypted = encrypt_all_offsets(crib, forward_tables, crib_count)
+
+        for first in range(0, alignments, ALIGNMENTS_PER_SLICE):
+            # The first crib letter already rules out 25 of every 26 settings, for a slice of alignments at once
+            last = min(first + ALIGNMENTS_PER_SLICE, alignments)
+            alignment, trial = np.nonzero(encrypted[:, 0][None, :] == signal[first:last, None])
+            alignment += first
+            for position in range(1, crib.size):
+                consistent = encrypted[trial, position] == signal[alignment + position]
+                alignment, trial = alignment[consistent], trial[consistent]
+
+            for start, setting in zip(alignment.tolist(), trial.tolist()):
+                # Wind the machine back from the crib to the first letter of the message
+                count = (crib_count - start) % (26*26)
+                steps = rotor_steps(count, count + start)
+                offsets = (setting // 676, setting // 26 % 26, setting % 26)
+                start_offsets = tuple((offset - step) % 26 for offset, step in zip(offsets, steps))
+                matches.append((start, count, start_offsets))
+    return matches
+
+
+def crib_attack(ciphertext, crib, wirings, orderings=None, counts=range(26*26), counts_per_task=26,
+                max_workers=None):
+    """
+    Known-plaintext attack: find every setting under which 'crib' encrypts to part of 'ciphertext'.
+
+    Every alignment of the crib against the ciphertext letters and every rotor start offset is
+    tested. For each count at the crib start, the crib is encrypted under all 26^3 offsets once with
+    encrypt_all_offsets() and compared to the alignments in bulk, ALIGNMENTS_PER_SLICE at a time so
+    memory does not grow with the ciphertext; contradicting settings are discarded one crib letter
+    at a time, so every letter removes 25/26 of what is left. Counts are spread over a process pool. Surviving settings are ranked by the index of coincidence of the
+    whole decrypted message.
+
+    Parameters:
+    - ciphertext (str or bytes): The ciphertext; non-letters are ignored.
+    - crib (str): Known plaintext letters; non-letters are ignored.
+    - wirings (list): The three rotor wirings.
+    - orderings (iterable): Orders of the wirings to try, as index tuples; defaults to the given order.
+    - counts (iterable): Counts at the crib start to try; the default covers every stepping phase.
+    - counts_per_task (int): Counts handled by one worker task.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    - list: Tuples (score, ordering, count, start_offsets, alignment), best first. 'count' is the
+      starting count modulo 676 and 'alignment' the letter index where the crib starts.
+    """
+    signal = letter_indices(ciphertext)
+    crib = letter_indices(crib)
+    orderings = [tuple(range(len(wirings)))] if orderings is None else [tuple(order) for order in orderings]
+    counts = list(counts)
+    if crib.size == 0 or crib.size > signal.size:
+        return []
+
+    results = []
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        futures = {}
+        for ordering in orderings:
+            forward_tables = forward_stack([wirings[index] for index in ordering])
+            for start in range(0, len(counts), counts_per_task):
+                future = executor.submit(_crib_counts, signal, crib, forward_tables,
+                                         counts[start:start + counts_per_task])
+                futures[future] = ordering
+
+        positions = np.arange(signal.size, dtype=np.int64)
+        for future in as_completed(futures):
+            ordering = futures[future]
+            for alignment, count, start_offsets in future.result():
+                # Decrypt the whole message under the setting found, from the machine's starting rotors
+                rotors = create_machine([wirings[index] for index in ordering], start_offsets=start_offsets).rotors
+                plaintext = apply_rotors(rotors, signal, rotor_steps(count, count + positions), inverse=True)
+                score = float(score_ioc(plaintext[None, :])[0])
+                results.append((score, ordering, count, start_offsets, alignment))
+
+    results.sort(key=lambda result: result[0], reverse=True)
+    return results
+
+
+if __name__ == "__main__":
+    wirings = [rotor_1_wiring, rotor_2_wiring, rotor_3_wiring]
+    plaintext = ("TOBEORNOTTOBETHATISTHEQUESTIONWHETHERTISNOBLERINTHEMINDTOSUFFERTHESLINGSANDARROWSOF"
+                 "OUTRAGEOUSFORTUNEORTOTAKEARMSAGAINSTASEAOFTROUBLESANDBYOPPOSINGENDTHEMTODIETOSLEEP")
+    ciphertext = create_machine([rotor_2_wiring, rotor_3_wiring, rotor_1_wiring], count=673).encrypt_bytes(
+        plaintext.encode())
+    print(f"Ciphertext: {ciphertext.decode()}")
+
+    best = search_settings(ciphertext, wirings, orderings=permutations(range(3)))
+    for score, ordering, count, offsets in best[:3]:
+        print(f"IoC {score:.4f}: rotor order {ordering}, count {count}, start offsets {offsets}")
+
+    consistent = crib_attack(ciphertext, "WHETHERTIS", wirings, orderings=permutations(range(3)))
+    for score, ordering, count, offsets, alignment in consistent[:3]:
+        print(f"Crib at letter {alignment}, IoC {score:.4f}: rotor order {ordering}, count {count}, "
+              f"start offsets {offsets}")
@@ -1,4 +1,182 @@
+import mmap
+import os
 import string
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+
+class SubstitutionCipher:
+    """
+    Monoalphabetic substitution cipher working through str.translate / bytes.translate tables.
+
+    The cipher is built from a 26-letter key string (the image of A..Z, like encrypt_string) or
+    from a dict of single characters (like mapping_q1, which may be partial). The decryption key
+    is derived by inverting it. Characters in 'keep' always map to themselves. Any other character
+    the key does not cover is handled according to 'unmapped':
+    - "pass": copied unchanged
+    - "replace": replaced with 'replacement'
+    - "error": raises KeyError, like indexing the original dicts did
+    """
+
+    POLICIES = ("pass", "replace", "error")
+
+    def __init__(self, key, unmapped="pass", replacement="-", keep=" \n"):
+        if unmapped not in self.POLICIES:
+            raise ValueError(f"Unknown policy for unmapped characters: {unmapped}")
+        if not isinstance(replacement, str) or len(replacement) != 1:
+            raise ValueError(f"The replacement must be a single character, got {replacement!r}")
+        if isinstance(key, str):
+            if len(key) != 26:
+                raise ValueError("A key string must give the image of all 26 letters")
+            key = dict(zip(string.ascii_uppercase, key))
+        mapping = dict(key)
+        for char in keep:
+            mapping.setdefault(char, char)
+        if len(set(mapping.values())) != len(mapping):
+            raise ValueError("Key maps two characters to the same character, it cannot be inverted")
+
+        self.unmapped = unmapped
+        self.replacement = replacement
+        self.encrypt_key = mapping
+        self.decrypt_key = {value: char for char, value in mapping.items()}
+        self.encrypt_tables = self._build_tables(self.encrypt_key)
+        self.decrypt_tables = self._build_tables(self.decrypt_key)
+
+    def _build_tables(self, mapping):
+        # str table, bytes table and the bytes every mapped character is made of (for error checks);
+        # the bytes table is None when the replacement does not fit in a byte
+        str_table = {ord(char): value for char, value in mapping.items()}
+        if self.unmapped == "replace":
+            str_table = _ReplacingTable(str_table, self.replacement)
+
+        byte_mapping = {ord(char): ord(value) for char, value in mapping.items()
+                        if ord(char) < 256 and ord(value) < 256}
+        default = ord(self.replacement) if self.unmapped == "replace" else None
+        if default is not None and default >= 256:
+            return str_table, None, bytes(byte_mapping)
+        bytes_table = bytes(byte_mapping.get(code, code if default is None else default) for code in range(256))
+        known = bytes(byte_mapping)
+        return str_table, bytes_table, known
+
+    def _translate(self, text, tables):
+        str_table, bytes_table, known = tables
+        if isinstance(text, str):
+            if self.unmapped == "error":
+                leftover = text.translate(dict.fromkeys(str_table))
+                if leftover:
+                    raise KeyError(leftover[0])
+            return text.translate(str_table)
+
+        if bytes_table is None:
+            raise ValueError(f"The replacement {self.replacement!r} cannot be written into bytes")
+        if self.unmapped == "error":
+            leftover = bytes(text).translate(None, known)
+            if leftover:
+                raise KeyError(chr(leftover[0]))
+        return text.translate(bytes_table)
+
+    def encrypt(self, plaintext):
+        """
+        Encrypt 'plaintext' in a single translate() call.
+
+        Parameters:
+        - plaintext (str or bytes): Text to encrypt.
+
+        Returns:
+        - str or bytes: The ciphertext, of the same type as the input.
+        """
+        return self._translate(plaintext, self.encrypt_tables)
+
+    def decrypt(self, ciphertext):
+        """
+        Decrypt 'ciphertext' in a single translate() call.
+
+        Parameters:
+        - ciphertext (str or bytes): Text to decrypt.
+
+        Returns:
+        - str or bytes: The plaintext, of the same type as the input.
+        """
+        return self._translate(ciphertext, self.decrypt_tables)
+
+    def encrypt_file(self, input_path, output_path, **options):
+        # File version of encrypt(), see transform_file() for the options
+        return self.transform_file(input_path, output_path, self.encrypt_tables, **options)
+
+    def decrypt_file(self, input_path, output_path, **options):
+        # File version of decrypt(), see transform_file() for the options
+        return self.transform_file(input_path, output_path, self.decrypt_tables, **options)
+
+    def transform_file(self, input_path, output_path, tables, chunk_size=1 << 24, max_workers=None,
+                       processes=True):
+        """
+        Translate a file of any size in parallel chunks, through memory maps on both sides.
+
+        The output file is preallocated to the input size, since substitution never changes the
+        length. Each worker maps its own chunk of the input and of the output and writes the
+        translated bytes at the same offset, so no chunk is ever sent between processes or joined in
+        Python. bytes.translate holds the GIL, so processes are used by default; threads only help
+        with the I/O.
+
+        Parameters:
+        - input_path (str): File to read.
+        - output_path (str): File to write; created or overwritten.
+        - tables (tuple): self.encrypt_tables or self.decrypt_tables.
+        - chunk_size (int): Bytes per chunk, rounded up to the mmap allocation granularity.
+        - max_workers (int): Number of workers, defaults to the CPU count.
+        - processes (bool): Use a process pool (True) or a thread pool (False).
+
+        Returns:
+        - int: The number of bytes written.
+
+        Raises:
+        - ValueError: If output_path is input_path, which would be truncated before it is read.
+        """
+        _, bytes_table, known = tables
+        if bytes_table is None:
+            raise ValueError(f"The replacement {self.replacement!r} cannot be written into bytes")
+        if os.path.exists(output_path) and os.path.samefile(input_path, output_path):
+            raise ValueError(f"{output_path} is the input file and cannot be written in place")
+        check = self.unmapped == "error"
+        granularity = mmap.ALLOCATIONGRANULARITY
+        chunk_size = -(-chunk_size // granularity) * granularity
+        size = os.path.getsize(input_path)
+        with open(output_path, "wb") as sink:
+            sink.truncate(size)
+        if size == 0:
+            return 0
+
+        pool = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with pool(max_workers=max_workers or os.cpu_count() or 1) as executor:
+            starts = range(0, size, chunk_size)
+            lengths = [min(chunk_size, size - start) for start in starts]
+            list(executor.map(_translate_file_chunk, [input_path] * len(starts), [output_path] * len(starts),
+                              starts, lengths, [bytes_table] * len(starts), [known] * len(starts),
+                              [check] * len(starts)))
+        return size
+
+
+def _translate_file_chunk(input_path, output_path, start, length, bytes_table, known, check):
+    # Worker: translate input[start:start + length] straight into the same range of the output
+    with open(input_path, "rb") as source, open(output_path, "r+b") as sink:
+        with mmap.mmap(source.fileno(), length, access=mmap.ACCESS_READ, offset=start) as chunk, \
+                mmap.mmap(sink.fileno(), length, offset=start) as target:
+            data = chunk[:]
+            if check:
+                leftover = data.translate(None, known)
+                if leftover:
+                    raise KeyError(chr(leftover[0]))
+            target[:] = data.translate(bytes_table)
+
+
+class _ReplacingTable(dict):
+    # str.translate table that maps every character it does not contain to a replacement
+    def __init__(self, table, replacement):
+        super().__init__(table)
+        self.replacement = replacement
+
+    def __missing__(self, code):
+        return self.replacement
+
 
 mapping = {
     "V": "E",
@@ -106,12 +284,6 @@ LYTOB EWISH DTODI ETOSL EEPTO SLEEP PERCH ANCET ODREA
 MAYTH EREST HERUB
 """
 
-encrypted_string = ""
-for char in plaintext:
-    encrypted_string += encrypt_key[char]
-
-print(encrypted_string)
-
 encrypted_string2 = """
 XQDVQ NAQXX QDVXC SXGOX CVTIV OXGQA KCVXC VNXGO AQDUV 
 NGAXC VZGAW XQOIE EVNXC VOUGA HOSAW SNNQK OQEQI XNSHV 
@@ -123,12 +295,6 @@ UBXQD VKGOC WXQWG VXQOU VVPXQ OUVVP PVNJC SAJVX QWNVS
 ZSBXC VNVOX CVNID
 """
 
-decrypted_string = ""
-for char in encrypted_string2:
-    decrypted_string += decrypt_key[char]
-
-print(decrypted_string)
-
 decrypted_string2 = """
 TOBEO RNOTT OBETH ATIST HEQUE STION WHETH ERTIS NOBLE 
 RINTH EMIND TOSUF FERTH ESLIN GSAND ARROW SOFOU TRAGE 
@@ -175,11 +341,14 @@ mapping_q1 = {
     "\n": "\n",
     " ": " "
 }
-q1_output = ""
-for char in q1:
-    if char not in mapping_q1:
-        q1_output += "-"
-    else:
-        q1_output += mapping_q1[char]
-
-print(q1_output)
+
+if __name__ == "__main__":
+    cipher = SubstitutionCipher(encrypt_string, unmapped="error")
+    encrypted_string = cipher.encrypt(plaintext)
+    print(encrypted_string)
+
+    decrypted_string = cipher.decrypt(encrypted_string2)
+    print(decrypted_string)
+
+    q1_output = SubstitutionCipher(mapping_q1, unmapped="replace").encrypt(q1)
+    print(q1_output)
@@ -0,0 +1,263 @@
+import math
+import os
+import random
+import sys
+import string
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from question2_assignment2_8191716 import SubstitutionCipher, q1
+
+ENGLISH_ORDER = "ETAOINSHRDLCUMWFGYPBVKJXQZ"  # Letters from most to least frequent
+
+
+def letter_indices(text):
+    """
+    Keep only the letters of 'text', upper-cased, as indices 0-25.
+
+    Parameters:
+    - text (str or bytes): Any text.
+
+    Returns:
+    - np.ndarray: int64 array of letter indices.
+    """
+    if isinstance(text, str):
+        text = text.encode("utf-8", errors="ignore")
+    data = np.frombuffer(text.upper(), dtype=np.uint8)
+    return (data[(data >= 65) & (data <= 90)] - 65).astype(np.int64)
+
+
+def ngram_log_probabilities(text, n=4, floor=0.01):
+    """
+    Build a flat table of n-gram log10-probabilities from a corpus.
+
+    N-grams are indexed in base 26 (AAAA = 0, AAAB = 1, ...). N-grams that never occur get the
+    probability of 'floor' occurrences, so a single unseen n-gram does not dominate a score.
+
+    Parameters:
+    - text (str or bytes): English corpus; non-letters are skipped.
+    - n (int): N-gram length.
+    - floor (float): Pseudo-count given to unseen n-grams.
+
+    Returns:
+    - np.ndarray: float32 array of length 26^n.
+    """
+    return counts_to_log_probabilities(ngram_counts(letter_indices(text), n), floor)
+
+
+def ngram_counts(letters, n):
+    # Occurrences of every n-gram in an array of letter indices, indexed in base 26
+    index = np.zeros(max(letters.size - n + 1, 0), dtype=np.int64)
+    for position in range(n):
+        index = index * 26 + letters[position:letters.size - n + 1 + position]
+    return np.bincount(index, minlength=26**n)
+
+
+def counts_to_log_probabilities(counts, floor=0.01):
+    # log10-probabilities as float32, with unseen n-grams counted as 'floor' occurrences
+    counts = counts.astype(np.float64)
+    total = max(counts.sum(), 1.0)
+    return np.log10(np.where(counts > 0, counts, floor) / total).astype(np.float32)
+
+
+def build_ngram_file(corpus_paths, path, n=4, floor=0.01, block_size=1 << 24):
+    """
+    Count n-grams over local corpus files and store the log-probability table in 'path'.
+
+    The corpus is read 'block_size' bytes at a time, carrying the last n - 1 letters of a block
+    over to the next, so corpora of any size can be used. The file holds the raw float32 table
+    (26^n entries, 1.8 MB for quadgrams), so open_ngram_table() can map it without parsing.
+
+    Parameters:
+    - corpus_paths (list): Text files making up the corpus.
+    - path (str): Output file.
+    - n (int): N-gram length, e.g. 3 or 4.
+    - floor (float): Pseudo-count given to unseen n-grams.
+    - block_size (int): Bytes read at a time.
+
+    Returns:
+    - int: The number of n-grams counted.
+    """
+    counts = np.zeros(26**n, dtype=np.int64)
+    for corpus_path in corpus_paths:
+        carry = np.zeros(0, dtype=np.int64)
+        with open(corpus_path, "rb") as corpus:
+            for block in iter(lambda: corpus.read(block_size), b""):
+                letters = np.concatenate((carry, letter_indices(block)))
+                counts += ngram_counts(letters, n)
+                carry = letters[max(letters.size - (n - 1), 0):]
+
+    temp_path = path + ".tmp"
+    counts_to_log_probabilities(counts, floor).tofile(temp_path)
+    os.replace(temp_path, path)
+    return int(counts.sum())
+
+
+def open_ngram_table(path):
+    """
+    Map an n-gram table written by build_ngram_file() into memory, read-only.
+
+    The operating system shares the mapped pages between processes, so any number of workers can
+    open the same file without each holding a copy.
+
+    Parameters:
+    - path (str): Table file.
+
+    Returns:
+    - tuple: (table, n) with 'table' a float32 np.memmap indexed by the base-26 n-gram value.
+    """
+    n = ngram_order(os.path.getsize(path) // 4)
+    if n is None:
+        raise ValueError(f"{path} does not hold a 26^n float32 n-gram table")
+    return np.memmap(path, dtype=np.float32, mode="r"), n
+
+
+def ngram_order(entries):
+    # n for a table of 26^n entries, None if 'entries' is not a power of 26
+    n = round(math.log(entries, 26)) if entries > 1 else 0
+    return n if n >= 1 and 26**n == entries else None
+
+
+class QuadgramClimber:
+    """
+    Hill climber over decryption keys with incremental n-gram scoring (quadgrams by default).
+
+    The key is a permutation 'key' with key[c] the plaintext letter of ciphertext letter c. The score
+    is the sum of the log-probabilities of all plaintext n-grams. A swap of two key entries only
+    changes the n-grams containing one of the two ciphertext letters, so only those are rescored.
+    The per-n-gram contributions are kept in an array.
+    """
+
+    def __init__(self, ciphertext, log_probabilities, n=4):
+        if len(log_probabilities) != 26**n:
+            raise ValueError(f"Expected a table of 26^{n} entries, got {len(log_probabilities)}")
+        self.cipher = letter_indices(ciphertext)
+        self.log_probabilities = log_probabilities
+        self.weights = 26 ** np.arange(n - 1, -1, -1, dtype=np.int64)  # Base-26 index of an n-gram
+        starts = np.arange(max(self.cipher.size - n + 1, 0))
+        self.windows = self.cipher[starts[:, None] + np.arange(n)]  # Ciphertext letters of each n-gram
+
+        # touches[c, s] is True when n-gram s contains ciphertext letter c
+        self.touches = np.zeros((26, starts.size), dtype=bool)
+        for position in range(n):
+            self.touches[self.windows[:, position], starts] = True
+
+    def score(self, key):
+        # Full score of 'key' and the contribution of every n-gram
+        contributions = self.log_probabilities[key[self.windows] @ self.weights].astype(np.float64)
+        return contributions.sum(), contributions
+
+    def initial_key(self):
+        # Most frequent ciphertext letter to E, the next to T, and so on
+        frequencies = np.bincount(self.cipher, minlength=26)
+        key = np.empty(26, dtype=np.int64)
+        key[np.argsort(-frequencies, kind="stable")] = [ord(letter) - 65 for letter in ENGLISH_ORDER]
+        return key
+
+    def climb(self, key, rng, patience=2000, temperature=20.0, cooling=0.9995):
+        """
+        Improve 'key' by random swaps until 'patience' swaps in a row bring no improvement.
+
+        With a positive 'temperature' worse swaps are sometimes accepted (simulated annealing), the
+        temperature shrinking by 'cooling' after every swap.
+
+        Parameters:
+        - key (np.ndarray): Starting decryption key; modified in place.
+        - rng (random.Random): Random source for swaps and acceptance.
+        - patience (int): Swaps without improvement before stopping.
+        - temperature (float): Initial annealing temperature, 0 for plain hill climbing.
+        - cooling (float): Factor applied to the temperature after each swap.
+
+        Returns:
+        - tuple: (score, key) of the best key seen.
+        """
+        score, contributions = self.score(key)
+        best_score, best_key = score, key.copy()
+        stale = 0
+        while stale < patience:
+            first, second = rng.sample(range(26), 2)
+            starts = np.flatnonzero(self.touches[first] | self.touches[second])
+            key[first], key[second] = key[second], key[first]
+            changed = self.log_probabilities[key[self.windows[starts]] @ self.weights]
+            delta = float(changed.sum() - contributions[starts].sum())
+
+            if delta > 0 or (temperature > 0 and rng.random() < math.exp(delta / temperature)):
+                score += delta
+                contributions[starts] = changed
+            else:
+                key[first], key[second] = key[second], key[first]
+            temperature *= cooling
+
+            if score > best_score + 1e-9:
+                best_score, best_key = score, key.copy()
+                stale = 0
+            else:
+                stale += 1
+        return best_score, best_key
+
+
+def _restart(ciphertext, log_probabilities, n, restart, seed, patience, temperature):
+    # Worker: one climb with n-grams of length n, from the frequency-based key for restart 0 and a random key otherwise
+    if isinstance(log_probabilities, str):
+        log_probabilities, n = open_ngram_table(log_probabilities)
+    rng = random.Random(seed)
+    climber = QuadgramClimber(ciphertext, log_probabilities, n)
+    key = climber.initial_key()
+    if restart:
+        rng.shuffle(key)
+    return climber.climb(key, rng, patience=patience, temperature=temperature)
+
+
+def solve(ciphertext, log_probabilities, restarts=8, patience=2000, temperature=20.0, seed=0,
+          max_workers=None):
+    """
+    Find the most likely key of a substitution ciphertext.
+
+    Independent restarts run on a process pool and the best-scoring key wins.
+
+    Parameters:
+    - ciphertext (str): The ciphertext.
+    - log_probabilities (np.ndarray or str): N-gram table from ngram_log_probabilities(), or the
+      path of a file from build_ngram_file(), which every worker then maps instead of receiving a copy.
+      The n-gram length is read from the size of the table.
+    - restarts (int): Number of independent climbs.
+    - patience (int): Swaps without improvement before a climb stops.
+    - temperature (float): Initial annealing temperature, 0 for plain hill climbing.
+    - seed (int): Base seed; restart i uses seed + i. Restart 0 starts from the frequency-based key
+      and the others from random keys.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    - tuple: (key, score) where 'key' is the encryption key string (image of A..Z, like
+      encrypt_string), ready for SubstitutionCipher(key).decrypt(ciphertext).
+    """
+    n = None
+    if not isinstance(log_probabilities, str):
+        n = ngram_order(len(log_probabilities))
+        if n is None:
+            raise ValueError(f"An n-gram table has 26^n entries, got {len(log_probabilities)}")
+
+    seeds = [seed + restart for restart in range(restarts)]
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count() or 1) as executor:
+        results = list(executor.map(_restart, [ciphertext] * restarts, [log_probabilities] * restarts,
+                                    [n] * restarts, range(restarts), seeds, [patience] * restarts,
+                                    [temperature] * restarts))
+    score, decryption_key = max(results, key=lambda result: result[0])
+
+    encryption_key = [""] * 26
+    for cipher_letter, plain_letter in enumerate(decryption_key):
+        encryption_key[plain_letter] = string.ascii_uppercase[cipher_letter]
+    return "".join(encryption_key), score
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: python {sys.argv[0]} <english corpus file> [more corpus files]")
+        sys.exit(1)
+
+    table_path = "quadgrams.bin"
+    if not os.path.exists(table_path):
+        build_ngram_file(sys.argv[1:], table_path)
+
+    key, score = solve(q1, table_path)
+    print(f"Recovered key: {key} (score {score:.1f})")
+    print(SubstitutionCipher(key).decrypt(q1))
@@ -1,37 +1,272 @@
-import sympy
+import math
+import os
 import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
 
-num1 = random.randrange(2**13, 2**14)
-num2 = random.randrange(2**13, 2**14)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assignment 3"))
+from primality_8191716 import parallel_search, prime_window_search, search_prime_window
 
-while num1 % 4 != 3 or not sympy.isprime(num1):
-    num1 = random.randrange(2**13, 2**14)
 
-while num2 % 4 != 3 or not sympy.isprime(num2):
-    num2 = random.randrange(2**13, 2**14)
+def compute(x, mod):
+    return x*x % mod
 
-print(f"Prime p is: {num1}\nPrime q is: {num2}")
 
-modulus = num1 * num2
+def search_blum_window(bits, rng=random, window=4096, rounds=None):
+    """
+    Look for a Blum prime (prime p with p = 3 mod 4) among 'window' consecutive candidates.
 
-print(f"Modulus is: {modulus}")
+    Only numbers congruent to 3 mod 4 are drawn, start + 4j for j < window; the window is sieved
+    and only the survivors get a probable-prime test (search_prime_window() with step=4, residue=3).
 
-x0_seed = random.randrange(2, modulus)
+    Parameters:
+    - bits (int): Bit length of the prime, at least 3.
+    - rng (random.Random): Random source.
+    - window (int): Number of candidates per call.
+    - rounds (int): Miller-Rabin rounds per survivor, None for the default of is_probable_prime().
 
-while sympy.gcd(x0_seed, modulus) != 1:
-    x0_seed = random.randrange(2, modulus)
+    Returns:
+    - int or None: A Blum prime of exactly 'bits' bits, or None if the window holds none.
+    """
+    return search_prime_window(bits, rng, window, step=4, residue=3, rounds=rounds)
 
-print(f"Seed is: {x0_seed}")
 
-print("Computing x_n values:")
+def generate_blum_prime(bits, window=4096, max_workers=1, windows_per_task=4):
+    """
+    Generate a random Blum prime of exactly 'bits' bits.
 
-def compute(x, mod):
-    return x*x % mod
+    With max_workers > 1 independent searches with their own seeds run on a process pool
+    (parallel_search()) and the first prime found is returned; the other searches are stopped.
+
+    Parameters:
+    - bits (int): Bit length of the prime, at least 3.
+    - window (int): Candidates sieved at a time.
+    - max_workers (int): Number of worker processes, 1 to search in this process.
+    - windows_per_task (int): Windows a worker searches before reporting back.
+
+    Returns:
+    - int: A prime p with p = 3 mod 4 and p.bit_length() == bits.
+    """
+    if max_workers == 1:
+        while True:
+            prime = search_blum_window(bits, random, window)
+            if prime is not None:
+                return prime
+
+    prime, _ = parallel_search(prime_window_search, (bits, window, 4, 3), max_workers, windows_per_task)
+    return prime
+
+
+class BlumBlumShub:
+    """
+    Blum Blum Shub generator: x_{i+1} = x_i^2 mod n with n = p * q and p, q distinct primes congruent to 3 mod 4.
+
+    Each squaring contributes its 'bits_per_step' least significant bits, at most log2(log2 n) of
+    them, which is what keeps the generator secure. Output bits are produced in bulk into an internal
+    buffer of at least 'buffer_bits' bits, and getrandbits(), randbytes() and iteration all read from
+    that buffer. With bits_per_step=1 the bits are exactly the LSBs of x_1, x_2, ... as printed by
+    the assignment script.
+    """
+
+    def __init__(self, p, q, seed, bits_per_step=None, buffer_bits=1 << 16):
+        if p % 4 != 3 or q % 4 != 3:
+            raise ValueError("p and q must both be congruent to 3 mod 4")
+        if p == q:
+            raise ValueError("p and q must be distinct primes")
+        self.p = p
+        self.q = q
+        self.modulus = p * q
+        if math.gcd(seed, self.modulus) != 1:
+            raise ValueError("The seed must be coprime to the modulus")
+
+        max_bits = max(1, int(math.log2(math.log2(self.modulus))))
+        self.bits_per_step = max_bits if bits_per_step is None else bits_per_step
+        if not 1 <= self.bits_per_step <= max_bits:
+            raise ValueError(f"bits_per_step must be between 1 and {max_bits} for this modulus")
+
+        self.seed = seed
+        self.carmichael = (p - 1) * (q - 1) // math.gcd(p - 1, q - 1)  # lambda(n) = lcm(p - 1, q - 1)
+        self.state = seed  # x_i of the last squaring done
+        self.buffer_bits = buffer_bits
+        self._buffer = bytearray()  # Buffered output bits, most significant bit first
+        self._position = 0  # Index of the next unread bit of _buffer
+
+    def _refill(self, needed):
+        """
+        Square enough times to hold at least 'needed' unread bits (and at least buffer_bits more).
+
+        Squarings are done in groups of 8: the 8k output bits of a group are exactly k bytes, so each
+        group is packed into one integer and appended to the buffer with a single to_bytes().
+
+        Parameters:
+        - needed (int): Number of unread bits the buffer must hold afterwards.
+        """
+        del self._buffer[:self._position // 8]
+        self._position %= 8
+        available = 8 * len(self._buffer) - self._position
+        k = self.bits_per_step
+        groups = -(-max(needed - available, self.buffer_bits) // (8 * k))
+        x, modulus = self.state, self.modulus
+        mask = (1 << k) - 1
+        chunks = []
+        for _ in range(groups):
+            group = 0
+            for _ in range(8):
+                x = x * x % modulus
+                group = (group << k) | (x & mask)
+            chunks.append(group.to_bytes(k, "big"))
+        self.state = x
+        self._buffer += b"".join(chunks)
+
+    def seek(self, bit_index):
+        """
+        Position the generator so the next output bit is bit number 'bit_index' of the stream.
+
+        Knowing p and q, x_i = x_0^(2^i mod lambda(n)) mod n, so any point of the stream is reached
+        with two modular exponentiations instead of i squarings.
+
+        Parameters:
+        - bit_index (int): Index of the next bit to output, 0 being the first bit after the seed.
+        """
+        step, skip = divmod(bit_index, self.bits_per_step)
+        self.state = pow(self.seed, pow(2, step, self.carmichael), self.modulus)
+        self._buffer = bytearray()
+        self._position = 0
+        self.getrandbits(skip)
+
+    def getrandbits(self, n):
+        """
+        Return the next 'n' output bits as an integer, the first bit being the most significant.
+
+        Parameters:
+        - n (int): Number of bits, n >= 0.
+
+        Returns:
+        - int: An integer in [0, 2^n).
+        """
+        if n == 0:
+            return 0
+        if 8 * len(self._buffer) - self._position < n:
+            self._refill(n)
+        start, end = self._position, self._position + n
+        self._position = end
+        value = int.from_bytes(self._buffer[start // 8:(end + 7) // 8], "big")
+        return (value >> (-end % 8)) & ((1 << n) - 1)
+
+    def randbytes(self, n):
+        """
+        Return the next 8 * n output bits as bytes.
+
+        Parameters:
+        - n (int): Number of bytes.
+
+        Returns:
+        - bytes: 'n' pseudorandom bytes.
+        """
+        if self._position % 8:
+            return self.getrandbits(8 * n).to_bytes(n, "big")
+        if 8 * len(self._buffer) - self._position < 8 * n:
+            self._refill(8 * n)
+        start = self._position // 8
+        self._position += 8 * n
+        return bytes(self._buffer[start:start + n])
+
+    @classmethod
+    def generate(cls, bits, max_workers=1, **options):
+        """
+        Create a generator with a fresh 'bits'-bit modulus and a random seed.
+
+        Parameters:
+        - bits (int): Bit length of the modulus; p and q get half of it each.
+        - max_workers (int): Worker processes used to find each prime.
+        - options: Passed on to the constructor (bits_per_step, buffer_bits).
+
+        Returns:
+        - BlumBlumShub: The new generator.
+        """
+        p = generate_blum_prime(bits // 2, max_workers=max_workers)
+        q = p
+        while q == p:
+            q = generate_blum_prime(bits - bits // 2, max_workers=max_workers)
+        modulus = p * q
+        seed = random.randrange(2, modulus)
+        while math.gcd(seed, modulus) != 1:
+            seed = random.randrange(2, modulus)
+        return cls(p, q, seed, **options)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Iterating yields the output one bit at a time
+        return self.getrandbits(1)
+
+
+def _keystream_chunk(p, q, seed, bits_per_step, start_bit, bits):
+    # Worker: 'bits' output bits starting at 'start_bit', as bytes
+    generator = BlumBlumShub(p, q, seed, bits_per_step=bits_per_step)
+    generator.seek(start_bit)
+    return generator.getrandbits(bits).to_bytes(bits // 8, "big")
+
+
+def parallel_randbytes(p, q, seed, n, bits_per_step=None, start_byte=0, max_workers=None):
+    """
+    Generate 'n' bytes of BBS output on a process pool, identical to BlumBlumShub(...).randbytes(n).
+
+    The byte range is split into one disjoint slice per worker. Each worker seeks straight to its
+    first bit and the slices are joined in order, so the result matches the sequential generator
+    bit for bit.
+
+    Parameters:
+    - p (int): Prime congruent to 3 mod 4.
+    - q (int): Prime congruent to 3 mod 4.
+    - seed (int): x_0, coprime to p * q.
+    - n (int): Number of bytes.
+    - bits_per_step (int): Bits taken per squaring, as in BlumBlumShub.
+    - start_byte (int): Offset of the first byte in the stream.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+
+    Returns:
+    - bytes: The keystream bytes [start_byte, start_byte + n).
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    per_worker = -(-n // max_workers)
+    starts = range(0, n, per_worker) if n else []
+    slices = [(8 * (start_byte + start), 8 * min(per_worker, n - start)) for start in starts]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        chunks = executor.map(_keystream_chunk, *zip(*[(p, q, seed, bits_per_step, start, bits)
+                                                      for start, bits in slices]))
+        return b"".join(chunks)
+
+
+if __name__ == "__main__":
+    num1 = generate_blum_prime(14)
+    num2 = num1
+    while num2 == num1:
+        num2 = generate_blum_prime(14)
+
+    print(f"Prime p is: {num1}\nPrime q is: {num2}")
+
+    modulus = num1 * num2
+
+    print(f"Modulus is: {modulus}")
+
+    x0_seed = random.randrange(2, modulus)
+
+    while math.gcd(x0_seed, modulus) != 1:
+        x0_seed = random.randrange(2, modulus)
+
+    print(f"Seed is: {x0_seed}")
 
-x_next = compute(x0_seed, modulus)
-print(f"x_1 is {x_next}, LSB: {x_next % 2}")
-for i in range(1, 15):
-    x_next = compute(x_next, modulus)
-    print(f"x_{i+1} is {x_next}, LSB: {x_next % 2}")
+    print("Computing x_n values:")
 
+    x_next = compute(x0_seed, modulus)
+    print(f"x_1 is {x_next}, LSB: {x_next % 2}")
+    for i in range(1, 15):
+        x_next = compute(x_next, modulus)
+        print(f"x_{i+1} is {x_next}, LSB: {x_next % 2}")
 
+    generator = BlumBlumShub(num1, num2, x0_seed, bits_per_step=1)
+    print(f"Same LSBs from BlumBlumShub: {[bit for _, bit in zip(range(15), generator)]}")
+    print(f"16 bytes at {BlumBlumShub(num1, num2, x0_seed).bits_per_step} bits per squaring: "
+          f"{BlumBlumShub(num1, num2, x0_seed).randbytes(16).hex()}")
@@ -0,0 +1,285 @@
+import math
+import sys
+import time
+import numpy as np
+from question3_assignment2_8191716 import BlumBlumShub
+
+# Longest-run test parameters from NIST SP 800-22 section 2.4: (minimum n, block size M, smallest
+# class, class probabilities). Runs shorter than the smallest class are counted in the first class
+# and runs longer than the last one in the last class.
+LONGEST_RUN_PARAMETERS = [
+    (750_000, 10_000, 10, [0.0882, 0.2092, 0.2483, 0.1933, 0.1208, 0.0675, 0.0727]),
+    (6_272, 128, 4, [0.1174, 0.2430, 0.2493, 0.1752, 0.1027, 0.1124]),
+    (128, 8, 1, [0.2148, 0.3672, 0.2305, 0.1875]),
+]
+
+
+def igamc(a, x):
+    """
+    Regularized upper incomplete gamma function Q(a, x), which turns chi-square values into p-values.
+
+    Uses the series for P(a, x) when x < a + 1 and Lentz's continued fraction for Q(a, x) otherwise.
+
+    Parameters:
+    - a (float): Shape, a > 0.
+    - x (float): Argument, x >= 0.
+
+    Returns:
+    - float: Q(a, x) in [0, 1].
+    """
+    if x <= 0:
+        return 1.0
+    log_prefix = a * math.log(x) - x - math.lgamma(a)
+    if x < a + 1:
+        term = total = 1.0 / a
+        denominator = a
+        while abs(term) > abs(total) * 1e-15:
+            denominator += 1
+            term *= x / denominator
+            total += term
+        return max(0.0, 1.0 - total * math.exp(log_prefix))
+
+    tiny = 1e-300
+    b = x + 1 - a
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10_000):
+        an = -i * (i - a)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return min(1.0, math.exp(log_prefix) * h)
+
+
+def unpack(data):
+    # Packed bytes (first bit = most significant bit of the first byte) to an array of 0/1 values
+    return np.unpackbits(np.frombuffer(data, dtype=np.uint8) if isinstance(data, (bytes, bytearray)) else data)
+
+
+def pattern_counts(bits, m):
+    """
+    Occurrences of every overlapping m-bit pattern, wrapping around the end as SP 800-22 requires.
+
+    For m <= 25 the windows are read from the packed bytes: a 32-bit big-endian word starting at
+    every byte covers the m-bit windows at all 8 bit offsets of that byte, so the cost does not grow
+    with m.
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+    - m (int): Pattern length.
+
+    Returns:
+    - np.ndarray: 2^m counts, indexed by the pattern read as a binary number.
+    """
+    n = bits.size
+    if m == 0:
+        return np.array([n])
+    extended = np.resize(bits, n + m - 1)  # The sequence followed by its first m - 1 bits (repeated if short)
+    if m > 25:
+        windows = np.zeros(n, dtype=np.uint64)
+        for position in range(m):
+            windows = (windows << np.uint64(1)) | extended[position:position + n]
+        return np.bincount(windows.astype(np.int64), minlength=1 << m)
+
+    packed = np.concatenate((np.packbits(extended), np.zeros(4, dtype=np.uint8))).astype(np.uint32)
+    bytes_needed = (n + 7) // 8
+    words = (packed[:bytes_needed] << 24) | (packed[1:bytes_needed + 1] << 16) \
+        | (packed[2:bytes_needed + 2] << 8) | packed[3:bytes_needed + 3]
+    mask = np.uint32((1 << m) - 1)
+    counts = np.zeros(1 << m, dtype=np.int64)
+    for offset in range(8):
+        starts = (n - offset + 7) // 8  # Windows starting at bit 8i + offset with 8i + offset < n
+        windows = (words[:starts] >> np.uint32(32 - m - offset)) & mask
+        counts += np.bincount(windows, minlength=1 << m)
+    return counts
+
+
+def marginal_counts(counts):
+    # Counts of the (m-1)-bit patterns from those of the m-bit patterns (exact with wrap-around)
+    return counts.reshape(-1, 2).sum(axis=1)
+
+
+def frequency_test(bits):
+    """
+    Frequency (monobit) test: are there about as many ones as zeros?
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+
+    Returns:
+    - float: p-value.
+    """
+    n = bits.size
+    total = 2 * int(np.count_nonzero(bits)) - n
+    return math.erfc(abs(total) / math.sqrt(n) / math.sqrt(2))
+
+
+def block_frequency_test(bits, block_size=128):
+    """
+    Frequency test within blocks: is the proportion of ones about 1/2 in every block?
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+    - block_size (int): Block length M.
+
+    Returns:
+    - float: p-value.
+    """
+    blocks = bits.size // block_size
+    proportions = bits[:blocks * block_size].reshape(blocks, block_size).sum(axis=1, dtype=np.int64) / block_size
+    chi_square = 4 * block_size * float(((proportions - 0.5) ** 2).sum())
+    return igamc(blocks / 2, chi_square / 2)
+
+
+def runs_test(bits):
+    """
+    Runs test: does the number of runs of identical bits match a random sequence?
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+
+    Returns:
+    - float: p-value (0 when the frequency prerequisite already fails).
+    """
+    n = bits.size
+    ones = np.count_nonzero(bits) / n
+    if abs(ones - 0.5) >= 2 / math.sqrt(n):
+        return 0.0
+    runs = 1 + int(np.count_nonzero(bits[1:] != bits[:-1]))
+    spread = 2 * n * ones * (1 - ones)
+    return math.erfc(abs(runs - spread) / (2 * math.sqrt(2 * n) * ones * (1 - ones)))
+
+
+def longest_run_test(bits):
+    """
+    Test for the longest run of ones in a block, with M chosen from the sequence length as in SP 800-22.
+
+    The longest run of every block is found at once: the blocks are padded with a zero on each side,
+    and the gaps between consecutive zeros of the flattened array are the runs of ones.
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits, at least 128 of them.
+
+    Returns:
+    - float: p-value.
+    """
+    for minimum, block_size, smallest, probabilities in LONGEST_RUN_PARAMETERS:
+        if bits.size >= minimum:
+            break
+    else:
+        raise ValueError("The longest-run test needs at least 128 bits")
+
+    blocks = bits.size // block_size
+    padded = np.zeros((blocks, block_size + 2), dtype=np.uint8)
+    padded[:, 1:-1] = bits[:blocks * block_size].reshape(blocks, block_size)
+    zeros = np.flatnonzero(padded.ravel() == 0)
+    lengths = np.diff(zeros) - 1
+    rows = zeros[:-1] // (block_size + 2)
+    longest = np.maximum.reduceat(lengths, np.searchsorted(rows, np.arange(blocks)))
+
+    classes = np.clip(longest - smallest, 0, len(probabilities) - 1)
+    observed = np.bincount(classes, minlength=len(probabilities))
+    expected = blocks * np.array(probabilities)
+    chi_square = float(((observed - expected) ** 2 / expected).sum())
+    return igamc((len(probabilities) - 1) / 2, chi_square / 2)
+
+
+def serial_test(bits, m=16):
+    """
+    Serial test: are all overlapping m-bit patterns about equally frequent?
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+    - m (int): Pattern length, at least 3.
+
+    Returns:
+    - tuple: The two p-values (from the first and second differences of psi-squared).
+    """
+    n = bits.size
+    counts = pattern_counts(bits, m).astype(np.float64)
+    psi = []
+    for length in (m, m - 1, m - 2):
+        psi.append((1 << length) / n * float((counts ** 2).sum()) - n if length > 0 else 0.0)
+        counts = marginal_counts(counts)
+    first_difference = psi[0] - psi[1]
+    second_difference = psi[0] - 2 * psi[1] + psi[2]
+    return igamc(2 ** (m - 2), first_difference / 2), igamc(2 ** (m - 3), second_difference / 2)
+
+
+def approximate_entropy_test(bits, m=10):
+    """
+    Approximate entropy test: compare the frequencies of overlapping m-bit and (m+1)-bit patterns.
+
+    Parameters:
+    - bits (np.ndarray): Unpacked bits.
+    - m (int): Pattern length.
+
+    Returns:
+    - float: p-value.
+    """
+    n = bits.size
+
+    def phi(counts):
+        frequencies = counts[counts > 0] / n
+        return float((frequencies * np.log(frequencies)).sum())
+
+    longer = pattern_counts(bits, m + 1)
+    approximate_entropy = phi(marginal_counts(longer)) - phi(longer)
+    chi_square = 2 * n * (math.log(2) - approximate_entropy)
+    return igamc(2 ** (m - 1), chi_square / 2)
+
+
+TESTS = [
+    ("Frequency (monobit)", frequency_test),
+    ("Block frequency", block_frequency_test),
+    ("Runs", runs_test),
+    ("Longest run of ones", longest_run_test),
+    ("Serial", serial_test),
+    ("Approximate entropy", approximate_entropy_test),
+]
+
+
+def run_battery(data):
+    """
+    Run every test of TESTS over a bit sequence.
+
+    Parameters:
+    - data (bytes or np.ndarray): Packed bits (bytes or a uint8 array), e.g. from
+      BlumBlumShub.randbytes() or np.fromfile().
+
+    Returns:
+    - list: One tuple (name, p_value or tuple of p-values, seconds, bits per second) per test.
+    """
+    bits = unpack(data)
+    results = []
+    for name, test in TESTS:
+        start = time.perf_counter()
+        p_value = test(bits)
+        seconds = time.perf_counter() - start
+        results.append((name, p_value, seconds, bits.size / seconds if seconds else float("inf")))
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        data = np.fromfile(sys.argv[1], dtype=np.uint8)
+        print(f"Testing {data.size * 8} bits from {sys.argv[1]}")
+    else:
+        generator = BlumBlumShub.generate(512)
+        data = generator.randbytes(125_000)
+        print(f"Testing 10^6 bits from a BBS generator with a {generator.modulus.bit_length()}-bit modulus")
+
+    significance = 0.01
+    for name, p_value, seconds, rate in run_battery(data):
+        p_values = p_value if isinstance(p_value, tuple) else (p_value,)
+        verdict = "PASS" if min(p_values) >= significance else "FAIL"
+        formatted = ", ".join(f"{value:.6f}" for value in p_values)
+        print(f"{name:<22} p = {formatted:<20} {verdict}  ({seconds:.3f} s, {rate / 1e6:.1f} Mbit/s)")
@@ -1,4 +1,9 @@
+import os
 import random
+import secrets
+import threading
+from collections import deque
+from concurrent.futures import CancelledError, ProcessPoolExecutor
 
 def mod_inverse(a: int, q: int) -> int:
     """
@@ -119,6 +124,140 @@ def encrypt_set_k(public_key: (int, int, int), m: int, k: int) -> (int, int):
     return C1, C2
 
 
+def precompute_pairs(public_key: (int, int, int), count: int) -> list:
+    """
+    Compute the message-independent part of 'count' ElGamal encryptions.
+
+    Each pair uses a fresh k drawn from the operating system's random source (not the 'random'
+    module), so worker processes forked with the same 'random' state never share a k.
+
+    Parameters:
+    - public_key (tuple): The public key (q, alpha, y_a).
+    - count (int): Number of pairs to compute.
+
+    Returns:
+    - list: Pairs (C1, K) with C1 = alpha^k mod q and K = y_a^k mod q.
+    """
+    q, alpha, y_a = public_key
+    pairs = []
+    for _ in range(count):
+        k = secrets.randbelow(q - 2) + 1  # 1 <= k <= q - 2, as in encrypt()
+        pairs.append((pow(alpha, k, q), pow(y_a, k, q)))
+    return pairs
+
+
+class PrecomputedEncryptor:
+    """
+    ElGamal encryptor bound to one public key, split into an offline and an online phase.
+
+    C1 = alpha^k mod q and K = y_a^k mod q do not depend on the message, so a background thread keeps
+    a pool of such pairs filled (computing them on a process pool when 'max_workers' is not 0), and
+    encrypt() only multiplies: C2 = K * m mod q. Every pair is used once and then dropped. When the
+    pool drops below 'low_water' pairs the thread refills it up to 'pool_size'; if it is empty
+    encrypt() computes a pair itself, which is counted as an exhaustion in stats().
+    """
+
+    def __init__(self, public_key: (int, int, int), pool_size: int = 1024, low_water: int = 256,
+                 batch_size: int = 64, max_workers: int = None):
+        if not 0 <= low_water < pool_size:
+            raise ValueError("low_water must be between 0 and pool_size - 1")
+        self.public_key = public_key
+        self.pool_size = pool_size
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.pool = deque()  # (C1, K) pairs; appends and pops from different threads are safe on a deque
+
+        self.encryptions = 0
+        self.exhaustions = 0
+        self.refills = 0
+        self.precomputed = 0
+
+        self.executor = ProcessPoolExecutor(max_workers=max_workers) if max_workers != 0 else None
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._refill_loop, daemon=True)
+        self._thread.start()
+        self._wake.set()
+
+    def _refill_loop(self):
+        # Background thread: top the pool up to pool_size each time it is woken
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._closed:
+                return
+            missing = self.pool_size - len(self.pool)
+            if missing <= 0:
+                continue
+            self.refills += 1
+            counts = [min(self.batch_size, missing - start) for start in range(0, missing, self.batch_size)]
+            if self.executor is None:
+                batches = (precompute_pairs(self.public_key, count) for count in counts)
+            else:
+                try:
+                    futures = [self.executor.submit(precompute_pairs, self.public_key, count) for count in counts]
+                except RuntimeError:
+                    return  # close() shut the executor down in the meantime
+                batches = (future.result() for future in futures)
+            try:
+                for pairs in batches:
+                    if self._closed:
+                        return
+                    self.pool.extend(pairs)
+                    self.precomputed += len(pairs)
+            except CancelledError:
+                return
+
+    def encrypt(self, m: int) -> (int, int):
+        """
+        Encrypt a message 'm' with a precomputed pair: one modular multiplication.
+
+        Parameters:
+        - m (int): The message to encrypt, 0 <= m < q.
+
+        Returns:
+        - tuple: The ciphertext (C1, C2), as returned by encrypt().
+        """
+        try:
+            C1, K = self.pool.popleft()
+        except IndexError:
+            self.exhaustions += 1
+            C1, K = precompute_pairs(self.public_key, 1)[0]
+        self.encryptions += 1
+        if len(self.pool) < self.low_water:
+            self._wake.set()
+        return C1, (K * m) % self.public_key[0]
+
+    def wait_until_full(self):
+        # Block until the pool holds pool_size pairs, e.g. before a burst of encryptions
+        while len(self.pool) < self.pool_size and self._thread.is_alive():
+            self._wake.set()
+            self._thread.join(0.01)
+
+    def stats(self) -> dict:
+        # Pool level and counters; 'exhaustions' counts encryptions that found the pool empty
+        return {"pool": len(self.pool), "encryptions": self.encryptions, "exhaustions": self.exhaustions,
+                "refills": self.refills, "precomputed": self.precomputed}
+
+    def close(self):
+        # Stop the refill thread and the worker processes; unused pairs are discarded
+        # Pending batches are cancelled first, so the thread only waits for the batches already running
+        self._closed = True
+        self._wake.set()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+        self._thread.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.pool.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
 def decrypt(private_key: int, q: int, C1: int, C2:int) -> int:
     """
     Decrypt a ciphertext pair (C1, C2) using the ElGamal decryption scheme.
@@ -147,6 +286,79 @@ def decrypt(private_key: int, q: int, C1: int, C2:int) -> int:
 
     return m
 
+def batch_inverse(values: list, q: int) -> list:
+    """
+    Invert many values modulo 'q' at once with Montgomery's trick.
+
+    The prefix products are inverted with a single mod_inverse() call and the individual inverses
+    are peeled off backwards, for 3(n - 1) multiplications in total.
+
+    Parameters:
+    - values (list): Integers, none of them 0 mod q.
+    - q (int): The prime modulus.
+
+    Returns:
+    - list: The inverses, in the same order as 'values'.
+
+    Raises:
+    - ValueError: If a value is 0 mod q, since it has no inverse.
+    """
+    prefix = []
+    product = 1
+    for value in values:
+        product = (product * value) % q
+        prefix.append(product)
+    if not prefix:
+        return []
+    if product == 0:
+        # q is prime, so the product only vanishes at a value that is itself 0 mod q
+        raise ValueError(f"Value at index {prefix.index(0)} is 0 mod q and has no inverse")
+
+    inverse = mod_inverse(product, q)
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = (inverse * prefix[i - 1]) % q
+        inverse = (inverse * values[i]) % q
+    inverses[0] = inverse
+    return inverses
+
+
+def _decrypt_chunk(exponent: int, q: int, ciphertexts: list) -> list:
+    # Worker: m = C2 * C1^(q - 1 - x_a) mod q for every (C1, C2) of the chunk
+    return [(int(C2) * pow(int(C1), exponent, q)) % q for C1, C2 in ciphertexts]
+
+
+def decrypt_batch(private_key: int, q: int, ciphertexts, max_workers: int = None,
+                  chunk_size: int = 2048) -> list:
+    """
+    Decrypt many ciphertext pairs (C1, C2) with the same private key.
+
+    Since C1^(q - 1) = 1 mod q, K^-1 = C1^(-x_a) = C1^(q - 1 - x_a), so every message costs one
+    exponentiation and one multiplication, without an inversion. The ciphertexts are split into
+    chunks of 'chunk_size' that are decrypted on a process pool.
+
+    Parameters:
+    - private_key (int): The private key 'x_a' of the receiver.
+    - q (int): The prime modulus used in the encryption.
+    - ciphertexts (list or np.ndarray): Pairs (C1, C2), as returned by encrypt().
+    - max_workers (int): Number of worker processes, defaults to the CPU count; 1 decrypts in this process.
+    - chunk_size (int): Ciphertexts per task.
+
+    Returns:
+    - list: The decrypted messages, in the same order as 'ciphertexts'.
+    """
+    exponent = q - 1 - private_key
+    ciphertexts = [(C1, C2) for C1, C2 in ciphertexts]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(ciphertexts) <= chunk_size:
+        return _decrypt_chunk(exponent, q, ciphertexts)
+
+    chunks = [ciphertexts[start:start + chunk_size] for start in range(0, len(ciphertexts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(_decrypt_chunk, [exponent] * len(chunks), [q] * len(chunks), chunks)
+        return [m for chunk in results for m in chunk]
+
+
 def compute_m2_from_m1(m1: int, c_21: int, c_22: int, q: int) -> int:
     """
     Compute the value of a second message 'm2' given an initial message 'm1' and its ciphertext components.
@@ -0,0 +1,152 @@
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+from assignment_3_q1_8191716 import decrypt, encrypt_set_k, generate_keys
+
+MAGIC = b"EGH1"  # File format marker
+TAG_SIZE = 32  # HMAC-SHA256 tag at the end of the file
+
+
+def derive_keys(secret: int, q: int) -> (bytes, bytes):
+    """
+    Derive the keystream key and the MAC key from an encapsulated session secret.
+
+    Parameters:
+    - secret (int): The session secret, 0 < secret < q.
+    - q (int): The prime modulus, which fixes the length of the encoded secret.
+
+    Returns:
+    - tuple: (stream_key, mac_key), 32 bytes each.
+    """
+    encoded = secret.to_bytes((q.bit_length() + 7) // 8, "big")
+    return (hashlib.sha256(b"stream" + encoded).digest(),
+            hashlib.sha256(b"mac" + encoded).digest())
+
+
+def keystream_block(stream_key: bytes, index: int, size: int) -> bytes:
+    # Keystream block 'index' as SHAKE-256(key || index), so blocks can be produced independently
+    return hashlib.shake_256(stream_key + index.to_bytes(8, "big")).digest(size)
+
+
+def xor_bytes(data: bytes, keystream: bytes) -> bytes:
+    # XOR of two byte strings through Python integers, far faster than a byte-by-byte loop
+    return (int.from_bytes(data, "big") ^ int.from_bytes(keystream[:len(data)], "big")).to_bytes(len(data), "big")
+
+
+def file_header(length: int, C1: int, C2: int, block_size: int) -> bytes:
+    # MAGIC, the byte length of q, the encapsulation (C1, C2) and the block size
+    return MAGIC + length.to_bytes(2, "big") + C1.to_bytes(length, "big") + C2.to_bytes(length, "big") \
+        + block_size.to_bytes(4, "big")
+
+
+def encrypt_file(public_key: (int, int, int), source: str, sink: str, block_size: int = 1 << 16) -> int:
+    """
+    Encrypt a file with one ElGamal encapsulation and a SHAKE-256 keystream.
+
+    A random session secret is encrypted once with ElGamal (two exponentiations per file, whatever
+    its size); the file itself is XORed block by block with a keystream derived from the secret and
+    authenticated with HMAC-SHA256. Only one block is held in memory at a time.
+
+    The output holds MAGIC, the byte length L of q (2 bytes), C1 and C2 (L bytes each), the block
+    size (4 bytes), the encrypted data and the tag over everything before it.
+
+    Parameters:
+    - public_key (tuple): The public key (q, alpha, y_a).
+    - source (str): File to encrypt.
+    - sink (str): Output file.
+    - block_size (int): Bytes encrypted at a time.
+
+    Returns:
+    - int: The number of plaintext bytes encrypted.
+    """
+    q = public_key[0]
+    length = (q.bit_length() + 7) // 8
+    secret = secrets.randbelow(q - 2) + 1
+    C1, C2 = encrypt_set_k(public_key, secret, secrets.randbelow(q - 2) + 1)
+    stream_key, mac_key = derive_keys(secret, q)
+
+    header = file_header(length, C1, C2, block_size)
+    tag = hmac.new(mac_key, header, hashlib.sha256)
+    total = 0
+    with open(source, "rb") as plaintext, open(sink, "wb") as ciphertext:
+        ciphertext.write(header)
+        for index, block in enumerate(iter(lambda: plaintext.read(block_size), b"")):
+            encrypted = xor_bytes(block, keystream_block(stream_key, index, len(block)))
+            tag.update(encrypted)
+            ciphertext.write(encrypted)
+            total += len(block)
+        ciphertext.write(tag.digest())
+    return total
+
+
+def decrypt_file(private_key: int, q: int, source: str, sink: str) -> int:
+    """
+    Decrypt a file written by encrypt_file(), streaming it block by block.
+
+    The plaintext goes to a temporary file next to 'sink' that only replaces 'sink' once the tag
+    has been checked, so a tampered file never produces output.
+
+    Parameters:
+    - private_key (int): The private key 'x_a' of the receiver.
+    - q (int): The prime modulus.
+    - source (str): Encrypted file.
+    - sink (str): Output file.
+
+    Returns:
+    - int: The number of plaintext bytes written.
+
+    Raises:
+    - ValueError: If the file is not in this format or fails authentication.
+    """
+    temp_path = sink + ".tmp"
+    with open(source, "rb") as ciphertext:
+        if ciphertext.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{source} is not an ElGamal hybrid file")
+        length = int.from_bytes(ciphertext.read(2), "big")
+        C1 = int.from_bytes(ciphertext.read(length), "big")
+        C2 = int.from_bytes(ciphertext.read(length), "big")
+        block_size = int.from_bytes(ciphertext.read(4), "big")
+        if length != (q.bit_length() + 7) // 8 or block_size == 0:
+            raise ValueError(f"{source} was not encrypted for this modulus")
+
+        stream_key, mac_key = derive_keys(decrypt(private_key, q, C1, C2), q)
+        header = file_header(length, C1, C2, block_size)
+        tag = hmac.new(mac_key, header, hashlib.sha256)
+
+        total = 0
+        pending = ciphertext.read(TAG_SIZE)  # The last TAG_SIZE bytes read are held back as the tag
+        with open(temp_path, "wb") as plaintext:
+            for index, chunk in enumerate(iter(lambda: ciphertext.read(block_size), b"")):
+                data = pending + chunk
+                block, pending = data[:-TAG_SIZE], data[-TAG_SIZE:]
+                tag.update(block)
+                plaintext.write(xor_bytes(block, keystream_block(stream_key, index, len(block))))
+                total += len(block)
+
+    if len(pending) != TAG_SIZE or not hmac.compare_digest(pending, tag.digest()):
+        os.remove(temp_path)
+        raise ValueError(f"{source} failed authentication")
+    os.replace(temp_path, sink)
+    return total
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(f"Usage: python {sys.argv[0]} <file to encrypt>")
+        sys.exit(1)
+
+    # 2048-bit MODP group from RFC 3526, with generator 2
+    q = int("FFFFFFFFFFFFFFFFC90FDAA22168C234C4C6628B80DC1CD129024E088A67CC74020BBEA63B139B22514A0879"
+            "8E3404DDEF9519B3CD3A431B302B0A6DF25F14374FE1356D6D51C245E485B576625E7EC6F44C42E9A637ED6B0B"
+            "FF5CB6F406B7EDEE386BFB5A899FA5AE9F24117C4B1FE649286651ECE45B3DC2007CB8A163BF0598DA48361C55"
+            "D39A69163FA8FD24CF5F83655D23DCA3AD961C62F356208552BB9ED529077096966D670C354E4ABC9804F1746C"
+            "08CA18217C32905E462E36CE3BE39E772C180E86039B2783A2EC07A28FB5C55DF06F4C52C9DE2BCBF6955817183"
+            "995497CEA956AE515D2261898FA051015728E5A8AACAA68FFFFFFFFFFFFFFFF", 16)
+    public_key, private_key = generate_keys(q, 2)
+
+    encrypted_path = sys.argv[1] + ".egh"
+    decrypted_path = sys.argv[1] + ".decrypted"
+    print(f"Encrypted {encrypt_file(public_key, sys.argv[1], encrypted_path)} bytes to {encrypted_path}")
+    print(f"Decrypted {decrypt_file(private_key, q, encrypted_path, decrypted_path)} bytes to {decrypted_path}")
@@ -0,0 +1,199 @@
+import csv
+import heapq
+import json
+import os
+import sys
+import tempfile
+from itertools import groupby
+from assignment_3_q1_8191716 import batch_inverse
+
+
+def parse_int(value) -> int:
+    # Ciphertext fields may be JSON numbers or decimal / 0x-prefixed hexadecimal strings
+    return value if isinstance(value, int) else int(str(value).strip(), 0)
+
+
+def read_ciphertexts(path: str):
+    """
+    Stream the ciphertext records of a JSONL or CSV file.
+
+    JSONL files hold one object per line with keys "C1" and "C2" (or "c1" and "c2"); CSV files need a
+    header row with columns C1 and C2. An optional "m" field gives a known plaintext for the record.
+
+    Parameters:
+    - path (str): File to read; names ending in .csv are read as CSV, anything else as JSONL.
+
+    Returns:
+    - generator: Tuples (index, C1, C2, m) with 'index' the record number and 'm' None when unknown.
+    """
+    with open(path, newline="") as file:
+        if path.lower().endswith(".csv"):
+            records = ({key.strip(): value for key, value in row.items()} for row in csv.DictReader(file))
+        else:
+            records = (json.loads(line) for line in file if line.strip())
+        for index, record in enumerate(records):
+            C1 = parse_int(record["C1"] if "C1" in record else record["c1"])
+            C2 = parse_int(record["C2"] if "C2" in record else record["c2"])
+            m = record.get("m")
+            yield index, C1, C2, None if m in (None, "") else parse_int(m)
+
+
+class ReuseIndex:
+    """
+    Index of ciphertext records by C1, to find the messages encrypted with the same k.
+
+    Two records share C1 = alpha^k mod q exactly when they share k, so grouping by C1 finds every
+    reuse. Records go into a dict of C1 -> [(index, C2, m), ...], one hash lookup each. Once the dict
+    holds 'max_records' records it is written out as a run sorted by C1 and cleared, so memory stays
+    bounded; groups() then merges the sorted runs, which only needs one record per run in memory.
+    """
+
+    def __init__(self, max_records: int = 1_000_000, spill_dir: str = None):
+        self.max_records = max_records
+        self.spill_dir = spill_dir
+        self.table = {}
+        self.in_memory = 0
+        self.records = 0
+        self.runs = []  # Paths of the spilled runs
+
+    def add(self, index: int, C1: int, C2: int, m: int = None):
+        # Index one record, spilling the table to disk when it is full
+        self.table.setdefault(C1, []).append((index, C2, m))
+        self.in_memory += 1
+        self.records += 1
+        if self.in_memory >= self.max_records:
+            self._spill()
+
+    def _spill(self):
+        # Write the table as one line per record, sorted by C1, and clear it
+        descriptor, path = tempfile.mkstemp(prefix="reuse-run-", suffix=".txt", dir=self.spill_dir)
+        with os.fdopen(descriptor, "w") as run:
+            for C1 in sorted(self.table):
+                for index, C2, m in self.table[C1]:
+                    run.write(f"{C1:x} {index} {C2:x} {'-' if m is None else format(m, 'x')}\n")
+        self.runs.append(path)
+        self.table.clear()
+        self.in_memory = 0
+
+    @staticmethod
+    def _read_run(path: str):
+        # Records of a spilled run as (C1, index, C2, m), in C1 order
+        with open(path) as run:
+            for line in run:
+                C1, index, C2, m = line.split()
+                yield int(C1, 16), int(index), int(C2, 16), None if m == "-" else int(m, 16)
+
+    def groups(self):
+        """
+        Iterate over the reuse groups: the C1 values shared by two or more records.
+
+        Returns:
+        - generator: Tuples (C1, records) with 'records' a list of (index, C2, m), in index order.
+        """
+        if not self.runs:
+            for C1, records in self.table.items():
+                if len(records) > 1:
+                    yield C1, sorted(records)
+            return
+
+        self._spill()
+        merged = heapq.merge(*(self._read_run(path) for path in self.runs), key=lambda record: record[0])
+        for C1, records in groupby(merged, key=lambda record: record[0]):
+            records = [(index, C2, m) for _, index, C2, m in records]
+            if len(records) > 1:
+                yield C1, sorted(records)
+
+    def close(self):
+        # Delete the spilled runs
+        for path in self.runs:
+            os.remove(path)
+        self.runs = []
+        self.table.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def recover_messages(q: int, groups, batch_size: int = 10_000):
+    """
+    Recover every message of the reuse groups that contain a known plaintext.
+
+    Within a group K is the same for all records, so from a known pair (m1, C2_1) any other message
+    is m_i = C2_i * m1 * C2_1^-1 mod q. The C2_1 of up to 'batch_size' groups are inverted together
+    with batch_inverse(), which costs one mod_inverse() per batch instead of one per group. A known
+    record with C2_1 = 0 mod q (from m1 = 0) cannot be inverted, so it is never used, and groups
+    with no other known plaintext are skipped.
+
+    Parameters:
+    - q (int): The prime modulus.
+    - groups (iterable): (C1, records) tuples from ReuseIndex.groups().
+    - batch_size (int): Groups whose inversions are batched together.
+
+    Returns:
+    - generator: Tuples (index, m) for every record of a group with a known plaintext, known
+      records included.
+    """
+    batch = []
+    for C1, records in groups:
+        known = next(((C2, m) for _, C2, m in records if m is not None and C2 % q != 0), None)
+        if known is not None:
+            batch.append((known, records))
+        if len(batch) == batch_size:
+            yield from _recover_batch(q, batch)
+            batch = []
+    yield from _recover_batch(q, batch)
+
+
+def _recover_batch(q: int, batch: list):
+    # Messages of a batch of groups, each given as ((C2_1, m1), records)
+    inverses = batch_inverse([C2_1 for (C2_1, _), _ in batch], q)
+    for ((_, m1), records), inverse in zip(batch, inverses):
+        factor = (m1 * inverse) % q
+        for index, C2, _ in records:
+            yield index, (C2 * factor) % q
+
+
+def analyze(path: str, q: int, max_records: int = 1_000_000, spill_dir: str = None) -> (list, dict):
+    """
+    Find nonce reuse in a ciphertext file and recover what the known plaintexts expose.
+
+    Parameters:
+    - path (str): JSONL or CSV file, as read by read_ciphertexts().
+    - q (int): The prime modulus.
+    - max_records (int): Records kept in memory before spilling a sorted run to disk.
+    - spill_dir (str): Directory for the runs, defaults to the system temporary directory.
+
+    Returns:
+    - tuple: (groups, recovered) where 'groups' lists (C1, record indices) for every reuse group
+      and 'recovered' maps record indices to messages.
+    """
+    with ReuseIndex(max_records, spill_dir) as index:
+        for record in read_ciphertexts(path):
+            index.add(*record)
+        groups = []
+
+        def tracked_groups():
+            # Pass the groups on to recover_messages(), keeping only their C1 and record indices
+            for C1, records in index.groups():
+                groups.append((C1, [record[0] for record in records]))
+                yield C1, records
+
+        recovered = dict(recover_messages(q, tracked_groups()))
+    return groups, recovered
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print(f"Usage: python {sys.argv[0]} <ciphertexts .jsonl or .csv> <q>")
+        sys.exit(1)
+
+    groups, recovered = analyze(sys.argv[1], parse_int(sys.argv[2]))
+    print(f"{len(groups)} values of C1 are shared by more than one ciphertext")
+    for C1, indices in groups[:20]:
+        print(f"C1 = {C1}: records {indices}")
+    print(f"{len(recovered)} messages recovered from known plaintexts")
+    for index in sorted(recovered)[:20]:
+        print(f"Record {index}: m = {recovered[index]}")
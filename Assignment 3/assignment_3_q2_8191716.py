@@ -2,6 +2,7 @@ import random
 import math
 from typing import List
 import time
+from primality_8191716 import DETERMINISTIC_LIMIT, is_probable_prime, passes_trial_division, strong_probable_prime
 
 def miller_rabin(n: int) -> bool:
     """
@@ -24,20 +25,9 @@ def miller_rabin(n: int) -> bool:
     - To improve confidence in the primality result, the function can be run multiple times
       with different random bases.
     """
-    compute = n-1
-    k=0
-    while compute % 2 == 0:
-        compute //= 2
-        k+=1
-    # At end compute = q
+    # One random base; a^q is squared step by step instead of recomputing a^(2^j * q) for every j
     a = random.randint(2, n-2)
-    if pow(a, compute, n) == 1:
-        return True
-    for j in range(k):
-        exponent = 2**j * compute
-        if pow(a, exponent, n) == (n-1):
-            return True
-    return False
+    return strong_probable_prime(n, [a])
 def generate_odd_int(bits: int) -> int:
     """
     Generate a random odd integer with a specified bit length.
@@ -59,21 +49,28 @@ def generate_odd_int(bits: int) -> int:
 
 def run_n_times(n: int, number: int) -> List[bool]:
     """
-    Run the Miller-Rabin primality test multiple times on a given integer.
+    Test an integer for primality, as `n` Miller-Rabin rounds would.
 
-    This function performs the Miller-Rabin primality test `n` times on the integer `number`.
-    It returns a list of boolean values, where each value indicates whether the test
-    considered the number to be likely prime (True) or composite (False) for a given test.
+    Numbers with a small prime factor, and every number below DETERMINISTIC_LIMIT (about 3.3 * 10^24),
+    get one exact answer from trial division and the deterministic Miller-Rabin bases, repeated `n`
+    times; no random rounds are run for them. Only larger numbers get `n` independent Miller-Rabin
+    rounds with random bases.
 
     Parameters:
-    - n (int): The number of times to run the primality test.
+    - n (int): The number of results to return, and of random rounds for large numbers.
     - number (int): The integer to test for primality.
 
     Returns:
-    - List[bool]: A list containing the results of the Miller-Rabin test for each iteration.
-                  Each entry is True if the number is probably prime for that test,
-                  and False if it is composite.
+    - List[bool]: `n` results. Below DETERMINISTIC_LIMIT they are all the same exact answer: True
+                  if the number is prime, False if it is composite. Above it each entry is the
+                  result of one random round: True if the number is probably prime for that
+                  round, False if it is composite.
     """
+    # Numbers with a small factor, or small enough for the deterministic bases, get the exact answer
+    if not passes_trial_division(number):
+        return [False] * n
+    if number < DETERMINISTIC_LIMIT:
+        return [is_probable_prime(number)] * n
     out = []
     for i in range(n):
         out.append(miller_rabin(number))
@@ -123,11 +120,13 @@ if __name__ == "__main__":
     print("Generate Odd 14-bit Integer: ")
     rand_int = generate_odd_int(14)
     print(f"{rand_int}")
-    print("Running Miller-Rabin 7 times: ")
+    print("Testing with run_n_times(7) (a 14-bit number gets one exact answer, repeated 7 times): ")
     output = run_n_times(7, rand_int)
     print(output)
     if False in output:
         print(f"Number {rand_int} is Composite (any False means not prime)")
+    elif rand_int < DETERMINISTIC_LIMIT:
+        print(f"Number {rand_int} is Prime (exact below {DETERMINISTIC_LIMIT})")
     else:
         print(f"Number {rand_int} is probably Prime (confidence t=7)")
     print("Using is_prime function for verification: ")
@@ -138,7 +137,7 @@ if __name__ == "__main__":
         rand_int = generate_odd_int(14)
         output = run_n_times(7, rand_int)
         count += 1
-    print(f"Number {rand_int} is probably Prime")
+    print(f"Number {rand_int} is {'Prime' if rand_int < DETERMINISTIC_LIMIT else 'probably Prime'}")
     print(f"Found after {count} iterations")
 
     time_start = time.perf_counter()
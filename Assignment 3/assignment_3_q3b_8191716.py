@@ -1,9 +1,8 @@
 import random
 import time
-from sympy import isprime
 from functools import lru_cache, cache
 from cryptography.hazmat.primitives.asymmetric import rsa
-from assignment_3_q2_8191716 import miller_rabin, run_n_times
+from primality_8191716 import parallel_search, print_worker_stats, random_prime, safe_prime_window_search
 
 def generate_n_bit_prime(n: int) -> int:
     """
@@ -34,19 +33,16 @@ def generate_n_bit_random_prime(n: int) -> int:
     """
     Generates a random prime number with exactly `n` bits using probabilistic primality testing.
 
+    Windows of consecutive odd candidates are sieved against the odd primes below 20 000 and only
+    the survivors get a probable-prime test (see random_prime()).
+
     Parameters:
         n (int): The desired bit length of the generated prime.
 
     Returns:
         int: A prime number with exactly `n` bits.
     """
-    cand_prime = random.randint(2**(n-1), 2**n - 1)
-    test = run_n_times(10, cand_prime)
-
-    while cand_prime % 2 == 0 or cand_prime % 3 == 0 or cand_prime % 5 == 0 or cand_prime % 7 == 0 or (False in test):
-        cand_prime = random.randint(2**159, 2**160 - 1)
-        test = run_n_times(10, cand_prime)
-    return cand_prime
+    return random_prime(n)
 
 
 def generate_ab(p: int) -> (int, int):
@@ -420,17 +416,18 @@ def jacobian_to_affine(P: (int, int, int), p: int) -> (int, int):
 # END Optimizations
 ###################
 
-def generate_safe_prime(bits: int) -> (int, int):
+def generate_safe_prime(bits: int, max_workers: int = None) -> (int, int):
     """
     Generate a safe prime and its corresponding prime q.
 
     A safe prime is a prime number p such that p = 2 * q + 1, where q is also prime.
-    This function generates a random value for q, ensures it's odd, checks if q is prime,
-    and then computes p as 2 * q + 1. The process repeats until both q and p are prime.
+    Independent searches run on 'max_workers' processes with their own seeds; each sieves windows
+    of candidates q (and the matching p) against small primes and tests the survivors (see
+    safe_prime_window_search()). The first safe prime found wins and the other searches are stopped.
 
     Parameters:
-        bits (int): The number of bits for the prime q. The corresponding safe prime p
-                    will be calculated as 2 * q + 1.
+        bits (int): The number of bits of the safe prime p; q has bits - 1 bits.
+        max_workers (int): Number of worker processes, defaults to the CPU count.
 
     Returns:
         tuple: A tuple containing two integers (p, q), where:
@@ -438,20 +435,11 @@ def generate_safe_prime(bits: int) -> (int, int):
             - q is the prime used to generate p.
 
     Prints:
-        If the function tries 10,000 primes without finding a safe prime,
-        it prints the number of attempts made so far.
+        The candidates tried by each worker and its rate in candidates per second.
     """
-    count = 0
-    while True:
-        count += 1
-        q = random.getrandbits(bits - 1)
-        q |= 1  # Ensure q is odd
-        if count % 10_000 == 0:
-            print(f"Tried {count} primes")
-        if isprime(q):
-            p = 2 * q + 1
-            if isprime(p):
-                return p, q
+    (p, q), worker_stats = parallel_search(safe_prime_window_search, (bits,), max_workers)
+    print_worker_stats(worker_stats)
+    return p, q
 # For DH Implementation
 def find_generator(p: int, q: int) -> int:
     """
@@ -0,0 +1,451 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+
+
+def small_primes(limit: int) -> list:
+    """
+    List the primes below 'limit' with the sieve of Eratosthenes.
+
+    Parameters:
+    - limit (int): Exclusive upper bound, at least 2.
+
+    Returns:
+    - list: The primes below 'limit', in increasing order.
+    """
+    sieve = bytearray([1]) * limit
+    sieve[:2] = b"\x00\x00"
+    for number in range(2, math.isqrt(limit - 1) + 1):
+        if sieve[number]:
+            sieve[number * number::number] = bytes(len(range(number * number, limit, number)))
+    return [number for number in range(limit) if sieve[number]]
+
+
+TRIAL_PRIMES = small_primes(2000)
+TRIAL_PRODUCT = math.prod(TRIAL_PRIMES)  # One gcd with this product replaces 303 trial divisions
+
+# Bases making Miller-Rabin exact below each bound (Jaeschke; Jiang and Deng for the last two)
+DETERMINISTIC_BASES = [
+    (2_047, (2,)),
+    (1_373_653, (2, 3)),
+    (25_326_001, (2, 3, 5)),
+    (3_215_031_751, (2, 3, 5, 7)),
+    (2_152_302_898_747, (2, 3, 5, 7, 11)),
+    (3_474_749_660_383, (2, 3, 5, 7, 11, 13)),
+    (341_550_071_728_321, (2, 3, 5, 7, 11, 13, 17)),
+    (3_825_123_056_546_413_051, (2, 3, 5, 7, 11, 13, 17, 19, 23)),
+    (318_665_857_834_031_151_167_461, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37)),
+    (3_317_044_064_679_887_385_961_981, (2, 3, 5, 7, 11, 13, 17, 19, 23, 29, 31, 37, 41)),
+]
+DETERMINISTIC_LIMIT = DETERMINISTIC_BASES[-1][0]
+
+
+def miller_rabin_rounds(bits: int) -> int:
+    """
+    Number of random-base rounds giving an error below 2^-80 for a random odd 'bits'-bit candidate.
+
+    The bounds are those of Damgard, Landrock and Pomerance, as used by OpenSSL. They only hold for
+    randomly chosen candidates; numbers picked by an adversary need more rounds.
+
+    Parameters:
+    - bits (int): Bit length of the candidate.
+
+    Returns:
+    - int: Number of rounds.
+    """
+    for minimum, rounds in ((3747, 3), (1345, 4), (476, 5), (400, 6), (347, 7), (308, 8), (55, 27)):
+        if bits >= minimum:
+            return rounds
+    return 34
+
+
+def passes_trial_division(n: int) -> bool:
+    # False if n > 1 has a prime factor below 2000 other than itself
+    return n in TRIAL_PRIMES if n < 2000 else math.gcd(n, TRIAL_PRODUCT) == 1
+
+
+def strong_probable_prime(n: int, bases) -> bool:
+    """
+    Miller-Rabin test of an odd n > 3 against the given bases.
+
+    n - 1 is split into 2^s * d once; every base then costs one exponentiation a^d followed by at
+    most s - 1 modular squarings.
+
+    Parameters:
+    - n (int): Odd integer to test, n > 3.
+    - bases (iterable): Witnesses to try, each in [2, n - 2] (bases that are 0 mod n are skipped).
+
+    Returns:
+    - bool: False if one of the bases proves n composite, True otherwise.
+    """
+    d, s = n - 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+    for base in bases:
+        if base % n == 0:
+            continue
+        x = pow(base, d, n)
+        if x == 1 or x == n - 1:
+            continue
+        for _ in range(s - 1):
+            x = x * x % n
+            if x == n - 1:
+                break
+        else:
+            return False
+    return True
+
+
+def jacobi(a: int, n: int) -> int:
+    # Jacobi symbol (a / n) for odd n > 0, by quadratic reciprocity
+    a %= n
+    result = 1
+    while a:
+        while a % 2 == 0:
+            a //= 2
+            if n % 8 in (3, 5):
+                result = -result
+        a, n = n, a
+        if a % 4 == 3 and n % 4 == 3:
+            result = -result
+        a %= n
+    return result if n == 1 else 0
+
+
+def strong_lucas_probable_prime(n: int) -> bool:
+    """
+    Strong Lucas probable-prime test of an odd n > 3 with Selfridge's parameters.
+
+    D is the first of 5, -7, 9, -11, ... with Jacobi symbol (D / n) = -1, P = 1 and Q = (1 - D) / 4.
+    With n + 1 = 2^s * d, n passes if U_d = 0 mod n or V_(d * 2^r) = 0 mod n for some r < s. U and V
+    are computed together by doubling along the bits of d, so the cost is a few multiplications per
+    bit, about that of two Miller-Rabin rounds.
+
+    Parameters:
+    - n (int): Odd integer to test, n > 3.
+
+    Returns:
+    - bool: False if n is composite, True if it is a strong Lucas probable prime.
+    """
+    if math.isqrt(n) ** 2 == n:
+        return False  # No suitable D exists for squares
+    D = 5
+    while True:
+        symbol = jacobi(D, n)
+        if symbol == -1:
+            break
+        if symbol == 0 and abs(D) != n:
+            return False  # D shares a factor with n
+        D = -D - 2 if D > 0 else -D + 2
+    P, Q = 1, (1 - D) // 4
+
+    d, s = n + 1, 0
+    while d % 2 == 0:
+        d //= 2
+        s += 1
+
+    def halve(x):
+        # x / 2 mod n, n being odd
+        return (x + n if x % 2 else x) // 2 % n
+
+    U, V, Qk = 1, P, Q % n  # U_1, V_1 and Q^1
+    for bit in bin(d)[3:]:
+        U, V, Qk = U * V % n, (V * V - 2 * Qk) % n, Qk * Qk % n  # Index k -> 2k
+        if bit == "1":
+            U, V, Qk = halve(P * U + V), halve(D * U + P * V), Qk * Q % n  # Index 2k -> 2k + 1
+    if U == 0 or V == 0:
+        return True
+    for _ in range(s - 1):
+        V, Qk = (V * V - 2 * Qk) % n, Qk * Qk % n
+        if V == 0:
+            return True
+    return False
+
+
+def is_bpsw_probable_prime(n: int) -> bool:
+    """
+    Baillie-PSW test: a strong probable-prime test to base 2 followed by a strong Lucas test.
+
+    No composite is known to pass both, and none exists below 2^64. The cost is about three
+    Miller-Rabin rounds whatever the size of n.
+
+    Parameters:
+    - n (int): Integer to test.
+
+    Returns:
+    - bool: False if n is composite, True if it is a probable prime.
+    """
+    if n < 2 or not passes_trial_division(n):
+        return False
+    if n < 2000:
+        return True
+    return strong_probable_prime(n, [2]) and strong_lucas_probable_prime(n)
+
+
+def is_probable_prime(n: int, rounds: int = None, rng=random, backend: str = "miller_rabin") -> bool:
+    """
+    Primality test shared by all assignments.
+
+    Small prime factors are ruled out with a single gcd first. Below DETERMINISTIC_LIMIT
+    (about 3.3 * 10^24) Miller-Rabin with the matching base set of DETERMINISTIC_BASES gives an exact
+    answer. Above it, base 2 is tried followed by random bases, 'rounds' of them or
+    miller_rabin_rounds(n.bit_length()) by default. With backend="bpsw" is_bpsw_probable_prime() is
+    used instead, for any n.
+
+    Parameters:
+    - n (int): Integer to test.
+    - rounds (int): Random-base rounds for n >= DETERMINISTIC_LIMIT.
+    - rng (random.Random): Source of the random bases.
+    - backend (str): "miller_rabin" or "bpsw".
+
+    Returns:
+    - bool: False if n is composite, True if it is prime (certainly below DETERMINISTIC_LIMIT).
+    """
+    if backend == "bpsw":
+        return is_bpsw_probable_prime(n)
+    if backend != "miller_rabin":
+        raise ValueError(f"Unknown primality backend: {backend}")
+    if n < 2 or not passes_trial_division(n):
+        return False
+    if n < 2000:
+        return True
+    if n < DETERMINISTIC_LIMIT:
+        bases = next(bases for bound, bases in DETERMINISTIC_BASES if n < bound)
+        return strong_probable_prime(n, bases)
+    rounds = miller_rabin_rounds(n.bit_length()) if rounds is None else rounds
+    return strong_probable_prime(n, [2] + [rng.randrange(3, n - 1) for _ in range(rounds)])
+
+
+SIEVE_PRIMES = np.array(small_primes(20_000)[1:], dtype=np.int64)  # Odd primes used to sieve candidate windows
+_STEP_INVERSES = {}  # Small step -> inverses of step modulo each of SIEVE_PRIMES (0 where the prime divides step)
+
+
+def sieve_window(start: int, step: int, window: int) -> np.ndarray:
+    """
+    Sieve the candidates start + step * j, j < window, against SIEVE_PRIMES.
+
+    For each prime p not dividing 'step' the multiples of p among the candidates are the j of one
+    residue class, j = -start / step mod p. The first j of every class is computed for all primes at
+    once, and all the multiples are cleared with a single fancy-indexing assignment. A candidate
+    equal to one of the primes is kept.
+
+    Parameters:
+    - start (int): First candidate.
+    - step (int): Distance between candidates.
+    - window (int): Number of candidates.
+
+    Returns:
+    - np.ndarray: Boolean array, True for the candidates with no factor in SIEVE_PRIMES.
+    """
+    primes = SIEVE_PRIMES
+    inverses = _STEP_INVERSES.get(step)
+    if inverses is None:
+        inverses = np.array([pow(step, -1, prime) if step % prime else 0 for prime in primes.tolist()],
+                            dtype=np.int64)
+        if step < 1 << 16:
+            _STEP_INVERSES[step] = inverses  # Large steps (e.g. multiples of a DSA q) vary, so are not kept
+    residues = np.array([start % prime for prime in primes.tolist()], dtype=np.int64)
+    first = (-residues * inverses) % primes
+    used = (inverses != 0) & (first < window)
+    primes, first = primes[used], first[used]
+
+    counts = (window - 1 - first) // primes + 1  # Multiples of each prime inside the window
+    owner = np.repeat(np.arange(primes.size), counts)
+    rank = np.arange(owner.size) - np.repeat(np.cumsum(counts) - counts, counts)
+    alive = np.ones(window, dtype=bool)
+    alive[first[owner] + primes[owner] * rank] = False
+
+    if start <= SIEVE_PRIMES[-1]:
+        candidates = start + step * np.arange(window, dtype=np.int64)
+        alive |= np.isin(candidates, SIEVE_PRIMES)
+    return alive
+
+
+def search_prime_window(bits: int, rng=random, window: int = 4096, step: int = 2, residue: int = 1,
+                        rounds: int = None, backend: str = "miller_rabin") -> int:
+    """
+    Look for a prime among 'window' consecutive candidates of the form start + step * j.
+
+    The start is a random 'bits'-bit number congruent to 'residue' mod 'step' (odd numbers by
+    default, numbers congruent to 3 mod 4 for Blum primes with step=4 and residue=3). The window is
+    sieved with sieve_window() and only the survivors, about 1 in 12 for odd candidates, get a
+    probable-prime test. Primes that follow a long gap are slightly more likely to be picked than
+    with independent random candidates, which does not matter for cryptographic sizes.
+
+    Parameters:
+    - bits (int): Bit length of the prime, at least 3.
+    - rng (random.Random): Random source.
+    - window (int): Number of candidates.
+    - step (int): Distance between candidates, even.
+    - residue (int): Residue of the candidates mod 'step', odd.
+    - rounds (int): Miller-Rabin rounds per survivor, None for the default of is_probable_prime().
+    - backend (str): Primality test, "miller_rabin" or "bpsw".
+
+    Returns:
+    - int or None: The first prime of the window, of exactly 'bits' bits, or None if it holds none.
+    """
+    return _scan_prime_window(bits, rng, window, step, residue, rounds, backend)[0]
+
+
+def _scan_prime_window(bits, rng, window, step, residue, rounds, backend):
+    # search_prime_window() that also returns how many candidates it went through: (prime or None, count)
+    start = rng.getrandbits(bits - 1) | (1 << (bits - 1))
+    start += (residue - start) % step
+    window = min(window, ((1 << bits) - 1 - start) // step + 1)  # Stay below 2^bits
+    if window <= 0:
+        return None, 0
+    for offset in np.flatnonzero(sieve_window(start, step, window)).tolist():
+        candidate = start + step * offset
+        if is_probable_prime(candidate, rounds, rng, backend):
+            return candidate, offset + 1
+    return None, window
+
+
+def random_prime(bits: int, rng=random, window: int = 4096, step: int = 2, residue: int = 1,
+                 backend: str = "miller_rabin") -> int:
+    """
+    Generate a random prime of exactly 'bits' bits by sieving windows of candidates.
+
+    Parameters:
+    - bits (int): Bit length of the prime, at least 3.
+    - rng (random.Random): Random source.
+    - window (int): Candidates sieved at a time.
+    - step (int): Distance between candidates, as in search_prime_window().
+    - residue (int): Residue of the candidates mod 'step'.
+    - backend (str): Primality test, "miller_rabin" or "bpsw".
+
+    Returns:
+    - int: A prime p with p.bit_length() == bits and p = residue mod step.
+    """
+    while True:
+        prime = search_prime_window(bits, rng, window, step, residue, backend=backend)
+        if prime is not None:
+            return prime
+
+
+def prime_window_search(rng, bits: int, window: int = 4096, step: int = 2, residue: int = 1,
+                        backend: str = "miller_rabin") -> (int, int):
+    # One window of search_prime_window() in the form parallel_search() expects: (prime or None, candidates)
+    return _scan_prime_window(bits, rng, window, step, residue, None, backend)
+
+
+def safe_prime_window_search(rng, bits: int, window: int = 4096, backend: str = "miller_rabin") -> ((int, int), int):
+    """
+    Look for a safe prime p = 2q + 1 of exactly 'bits' bits, with q prime, in one window.
+
+    The candidates q = start + 6j are all 5 mod 6, so neither q nor p is divisible by 2 or 3. Both q
+    and p = 2 * start + 1 + 12j are sieved, so a survivor has no small factor on either side. Both
+    then get a base-2 test before the full tests, since most survivors fail one of them.
+
+    Parameters:
+    - rng (random.Random): Random source.
+    - bits (int): Bit length of p, at least 4.
+    - window (int): Number of candidates q.
+    - backend (str): Primality test, "miller_rabin" or "bpsw".
+
+    Returns:
+    - tuple: ((p, q) or None, number of candidates q gone through, up to the one found).
+    """
+    start = rng.getrandbits(bits - 2) | (1 << (bits - 2))
+    start += (5 - start) % 6
+    window = min(window, ((1 << (bits - 1)) - 1 - start) // 6 + 1)  # Keep q below 2^(bits - 1)
+    if window <= 0:
+        return None, 0
+    alive = sieve_window(start, 6, window) & sieve_window(2 * start + 1, 12, window)
+    for offset in np.flatnonzero(alive).tolist():
+        q = start + 6 * offset
+        p = 2 * q + 1
+        if strong_probable_prime(q, [2]) and strong_probable_prime(p, [2]) \
+                and is_probable_prime(q, rng=rng, backend=backend) and is_probable_prime(p, rng=rng, backend=backend):
+            return (p, q), offset + 1
+    return None, window
+
+
+_STOP = None  # Event shared with the workers of parallel_search()
+
+
+def _init_worker(stop):
+    # Pool initializer: keep the stop event of the current search
+    global _STOP
+    _STOP = stop
+
+
+def _search_task(search, args, seed, windows):
+    # Worker: run 'search' up to 'windows' times with its own RNG, stopping early once a result is found anywhere
+    rng = random.Random(seed)
+    attempts = 0
+    start = time.perf_counter()
+    result = None
+    for _ in range(windows):
+        if _STOP is not None and _STOP.is_set():
+            break
+        result, tried = search(rng, *args)
+        attempts += tried
+        if result is not None:
+            break
+    return result, os.getpid(), attempts, time.perf_counter() - start
+
+
+def parallel_search(search, args=(), max_workers: int = None, windows_per_task: int = 4) -> tuple:
+    """
+    Run independent copies of a randomized search on a process pool and return the first result.
+
+    Every task gets its own 64-bit seed and calls search(rng, *args) up to 'windows_per_task' times;
+    'search' must return (result or None, number of candidates tried up to and including the
+    result). As soon as one task returns a result the others are cancelled and a shared event makes
+    the running ones stop after their current window.
+
+    Parameters:
+    - search (callable): Module-level function such as prime_window_search or safe_prime_window_search.
+    - args (tuple): Extra arguments of 'search'.
+    - max_workers (int): Number of worker processes, defaults to the CPU count.
+    - windows_per_task (int): Calls of 'search' per task before reporting back.
+
+    Returns:
+    - tuple: (result, worker_stats) with worker_stats mapping each worker's process id to a dict of
+      "attempts", "seconds" and "attempts_per_second".
+    """
+    max_workers = max_workers or os.cpu_count() or 1
+    stop = multiprocessing.Event()
+    worker_stats = {}
+    result = None
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(stop,)) as executor:
+        pending = {executor.submit(_search_task, search, args, random.getrandbits(64), windows_per_task)
+                   for _ in range(max_workers)}
+        while result is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                found, pid, attempts, seconds = future.result()
+                stats = worker_stats.setdefault(pid, {"attempts": 0, "seconds": 0.0})
+                stats["attempts"] += attempts
+                stats["seconds"] += seconds
+                if found is not None and result is None:
+                    result = found
+            if result is None:
+                pending |= {executor.submit(_search_task, search, args, random.getrandbits(64), windows_per_task)
+                            for _ in done}
+        stop.set()
+        for future in pending:
+            future.cancel()
+        for future in pending:
+            if not future.cancelled():
+                _, pid, attempts, seconds = future.result()
+                stats = worker_stats.setdefault(pid, {"attempts": 0, "seconds": 0.0})
+                stats["attempts"] += attempts
+                stats["seconds"] += seconds
+
+    for stats in worker_stats.values():
+        stats["attempts_per_second"] = stats["attempts"] / stats["seconds"] if stats["seconds"] else 0.0
+    return result, worker_stats
+
+
+def print_worker_stats(worker_stats: dict):
+    # One line per worker of parallel_search(): candidates tried and rate, for capacity planning
+    for pid, stats in sorted(worker_stats.items()):
+        print(f"Worker {pid}: {stats['attempts']} candidates in {stats['seconds']:.2f} s "
+              f"({stats['attempts_per_second']:.0f} per second)")
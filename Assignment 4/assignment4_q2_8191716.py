@@ -13,11 +13,16 @@
 #  Due Date: Friday, November 29th, 2024                                                           #
 ####################################################################################################
 import hashlib
+import os
+import sys
 import timeit
 import time
 from cryptography.hazmat.primitives.asymmetric import rsa
 import random
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Assignment 3"))
+from primality_8191716 import is_probable_prime, parallel_search, print_worker_stats, random_prime, sieve_window
+
 def generate_prime(size: int) -> int:
     """
     Generates a random prime number of the specified size using RSA private key generation.
@@ -51,6 +56,9 @@ def miller_rabin(n: int, rounds: int = 40) -> bool:
     """
     Perform the Miller-Rabin primality test on a given integer 'n'.
 
+    Delegates to the shared is_probable_prime(): trial division first, then deterministic bases
+    below 3.3 * 10^24 and 'rounds' random bases above.
+
     Parameters:
     - n (int): The integer to test for primality. Should be greater than 2.
     - rounds (int): Number of random bases to test for confidence.
@@ -64,42 +72,15 @@ def miller_rabin(n: int, rounds: int = 40) -> bool:
         > miller_rabin(1019, rounds=40)  # Prime
         True
     """
-    # Handle edge cases
-    if n <= 1:
-        return False
-    if n <= 3 or n == 5 or n == 7 or n == 11 or n == 13:
-        return True
-    if n % 2 == 0 or n % 3 == 0 or n % 5 == 0 or n % 7 == 0 or n % 11 == 0 or n % 13 == 0:
-        return False
-
-    # Decompose (n - 1) into 2^k * q
-    q = n - 1
-    k = 0
-    while q % 2 == 0:
-        q //= 2
-        k += 1
-
-    # Perform the test 'rounds' times
-    for _ in range(rounds):
-        a = random.randint(2, n - 2)
-        x = pow(a, q, n)  # Compute a^q % n
-        if x == 1 or x == n - 1:
-            continue # satisfies Miller-Rabin for this base "a"
-        for _ in range(k - 1):
-            x = pow(x, 2, n) # Compute a^(2^j) mod n for some j, and see if we get -1 mod n. Done by repeated squaring
-            if x == n - 1:
-                break
-        else:
-            return False  # Composite if no 'a^(2^j * q) ≡ -1 (mod n)' is found
-
-    return True  # Likely prime
-
-def generate_prime_small(size: int) -> int:
+    return is_probable_prime(n, rounds)
+
+def generate_prime_small(size: int, backend: str = "miller_rabin") -> int:
     """
     Generate a small prime number of approximately the specified bit size.
 
     Parameters:
         size (int): The desired bit size of the prime number. Must be a positive integer.
+        backend (str): Primality test, "miller_rabin" or "bpsw" (see is_probable_prime()).
 
     Returns:
         int: A randomly generated prime number with the specified bit size.
@@ -112,20 +93,52 @@ def generate_prime_small(size: int) -> int:
 
     Notes:
         - The function ensures the prime number is within the range of the specified bit size.
-        - The Miller-Rabin test is used for primality checking to ensure high confidence.
+        - Candidates come from sieved windows of consecutive odd numbers (random_prime()), and only
+          those without a factor below 20 000 are checked with is_probable_prime().
 
     Raises:
         ValueError: If the size is less than 2, as no primes exist with fewer than 2 bits.
     """
-    cand_prime = random.randint(pow(2, size-1), pow(2, size) - 1)
-    while not miller_rabin(cand_prime):
-        cand_prime = random.randint(pow(2, size-1), pow(2, size) - 1)
-    return cand_prime
+    # Sieve windows of odd candidates so only the survivors get a primality test
+    return random_prime(size, backend=backend)
+
+def dsa_window_search(rng, q: int, window: int = 4096, backend: str = "miller_rabin") -> (int, int):
+    """
+    Look for a 1024-bit prime p = k * q + 1 among 'window' consecutive even values of k.
+
+    The candidates p = start + 2q * j are sieved against small primes and only the survivors are
+    tested, the form parallel_search() expects.
+
+    Parameters:
+        rng (random.Random): Random source.
+        q (int): The 160-bit prime q.
+        window (int): Number of candidates.
+        backend (str): Primality test, "miller_rabin" or "bpsw".
 
-def generate_dsa_primes() -> (int, int):
+    Returns:
+        tuple: (p or None, number of candidates gone through, up to the one found).
+    """
+    low, high = -(-pow(2, 1023) // q), (pow(2, 1024) - 2) // q  # k giving a 1024-bit p
+    k = rng.randint(low, high) & ~1
+    k += 2 if k < low else 0
+    window = min(window, (high - k) // 2 + 1)
+    start = k * q + 1
+    for offset in sieve_window(start, 2 * q, window).nonzero()[0].tolist():
+        p = start + 2 * q * offset
+        if is_probable_prime(p, rng=rng, backend=backend):
+            return p, offset + 1
+    return None, window
+
+def generate_dsa_primes(backend: str = "miller_rabin", max_workers: int = 1) -> (int, int):
     """
     Generate the primes `p` and `q` for the Digital Signature Algorithm (DSA).
 
+    Parameters:
+        backend (str): Primality test, "miller_rabin" or "bpsw" (Baillie-PSW, about the cost of three
+                       Miller-Rabin rounds per 1024-bit candidate).
+        max_workers (int): Number of worker processes searching for p; with more than one the first
+                           p found wins and each worker's candidates per second are printed.
+
     Returns:
         tuple[int, int]: A tuple containing:
             - p (int): A 1024-bit prime.
@@ -142,17 +155,21 @@ def generate_dsa_primes() -> (int, int):
 
     Notes:
         - This method ensures the conditions required for DSA: a 1024-bit prime `p` and a 160-bit prime `q` such that `q` divides `(p - 1)`.
-        - The Miller-Rabin primality test is used to ensure `p` is prime.
+        - The primality test selected by `backend` is used to ensure `p` and `q` are prime.
     """
     # Generate a 160-bit prime q
-    q = generate_prime_small(160)
-
-    # Find a 1024-bit prime p such that q | (p - 1)
-    while True:
-        k = random.randint(pow(2, 863), pow(2, 864) - 1)  # Generate a random k
-        p = k * q + 1
-        if p.bit_length() == 1024 and miller_rabin(p):  # Check p is 1024 bits and prime
-            return p, q
+    q = generate_prime_small(160, backend)
+
+    # Find a 1024-bit prime p such that q | (p - 1), sieving windows of candidates k * q + 1
+    if max_workers == 1:
+        while True:
+            p, _ = dsa_window_search(random, q, backend=backend)
+            if p is not None:
+                return p, q
+
+    p, worker_stats = parallel_search(dsa_window_search, (q, 4096, backend), max_workers)
+    print_worker_stats(worker_stats)
+    return p, q
 
 def generate_h(p: int, q: int) -> int:
     """